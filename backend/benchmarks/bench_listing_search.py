@@ -0,0 +1,142 @@
+# backend/benchmarks/bench_listing_search.py
+"""
+Listing search benchmark: case-insensitive $regex vs. the $text index
+
+Seeds a throwaway database with synthetic listings (1M by default), then
+times the old get_listings regex query against the new $text query with
+textScore ordering. Also prints documents examined per query from explain().
+
+Requires a MongoDB at MONGO_URL. Uses database `<DB_NAME>_bench`, which is
+dropped and re-seeded unless --reuse is given.
+
+Usage (from backend/):
+    python -m benchmarks.bench_listing_search [--listings 1000000] [--runs 20] [--reuse]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pymongo import MongoClient  # noqa: E402
+
+from config import settings  # noqa: E402
+
+WORDS = (
+    "wireless bluetooth headphones leather wallet vintage camera handmade ceramic mug "
+    "organic coffee beans yoga mat running shoes laptop stand mechanical keyboard desk lamp "
+    "logo design website development photo editing guitar lessons home cleaning tutoring "
+    "resume writing mobile app video editing translation copywriting seo audit"
+).split()
+CATEGORIES = ["Electronics", "Fashion", "Home", "Sports", "Design", "Development", "Education", "Writing"]
+QUERIES = ["headphones", "vintage camera", "website development", "ceramic", "guitar lessons", "seo"]
+
+
+def synthetic_listing(i: int, now: datetime) -> dict:
+    title = " ".join(random.choices(WORDS, k=4))
+    return {
+        "id": str(uuid.uuid4()),
+        "seller_id": f"seller-{i % 5000}",
+        "seller_name": f"Seller {i % 5000}",
+        "title": title.title(),
+        "description": " ".join(random.choices(WORDS, k=25)),
+        "price": round(random.uniform(5, 2000), 2),
+        "category": random.choice(CATEGORIES),
+        "images": [],
+        "tags": random.sample(WORDS, 3),
+        "stock": random.randint(0, 100),
+        "verified": False,
+        "rating": round(random.uniform(0, 5), 1),
+        "reviews_count": random.randint(0, 500),
+        "type": random.choice(["product", "service"]),
+        "timestamp": (now - timedelta(seconds=i)).isoformat(),
+    }
+
+
+def seed(collection, count: int, batch: int = 10_000):
+    collection.drop()
+    now = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    for offset in range(0, count, batch):
+        collection.insert_many(
+            [synthetic_listing(i, now) for i in range(offset, min(offset + batch, count))],
+            ordered=False
+        )
+    collection.create_index("id", unique=True)
+    collection.create_index("category")
+    collection.create_index([("title", "text"), ("description", "text")])
+    print(f"Seeded {count:,} listings in {time.perf_counter() - started:.1f}s")
+
+
+def regex_query(collection, term: str, limit: int):
+    query = {"$or": [
+        {"title": {"$regex": term, "$options": "i"}},
+        {"description": {"$regex": term, "$options": "i"}},
+    ]}
+    return list(collection.find(query, {"_id": 0}).limit(limit)), query
+
+
+def text_query(collection, term: str, limit: int):
+    pipeline = [
+        {"$match": {"$text": {"$search": term}}},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+        {"$sort": {"score": -1, "id": 1}},
+        {"$limit": limit},
+        {"$project": {"_id": 0}},
+    ]
+    return list(collection.aggregate(pipeline)), {"$text": {"$search": term}}
+
+
+def docs_examined(db, collection, query: dict, limit: int) -> int:
+    explain = db.command(
+        "explain",
+        {"find": collection.name, "filter": query, "limit": limit},
+        verbosity="executionStats"
+    )
+    return explain["executionStats"]["totalDocsExamined"]
+
+
+def time_runs(fn, runs: int):
+    samples = []
+    for i in range(runs):
+        term = QUERIES[i % len(QUERIES)]
+        started = time.perf_counter()
+        fn(term)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--reuse", action="store_true", help="skip seeding if the bench DB already exists")
+    args = parser.parse_args()
+
+    client = MongoClient(settings.MONGO_URL)
+    db = client[f"{settings.DB_NAME}_bench"]
+    collection = db.listings
+
+    if not (args.reuse and collection.estimated_document_count() >= args.listings):
+        seed(collection, args.listings)
+
+    print(f"\n{collection.estimated_document_count():,} listings, limit {args.limit}, {args.runs} runs\n")
+    for label, fn in (("$regex", regex_query), ("$text", text_query)):
+        median, p95 = time_runs(lambda term: fn(collection, term, args.limit), args.runs)
+        # Selective term so the regex scan cannot stop early after `limit` hits
+        _, query = fn(collection, "seo audit", args.limit)
+        examined = docs_examined(db, collection, query, args.limit)
+        print(f"{label:<8} median {median:9.2f} ms   p95 {p95:9.2f} ms   docs examined {examined:,}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# backend/benchmarks/bench_password_hashing.py
+"""
+Login storm benchmark: bcrypt inline on the event loop vs. in the process pool
+
+Fires CONCURRENT_LOGINS password verifications while a probe coroutine
+stands in for every other endpoint (chat sockets, listing reads) and records
+how late the event loop wakes it up. Reports login throughput and the probe's
+p50/p99 latency for both modes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_password_hashing [--logins 200] [--rounds 12] [--workers 4]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.password_hashing import PasswordHasher, build_context  # noqa: E402
+
+PROBE_INTERVAL = 0.005  # seconds between "other endpoint" requests
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def probe(stop: asyncio.Event, samples: list):
+    """Measure how late the loop schedules a cheap coroutine"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        samples.append((time.perf_counter() - started - PROBE_INTERVAL) * 1000)
+
+
+async def run_storm(verify, logins: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_login():
+        async with semaphore:
+            assert await verify()
+
+    stop = asyncio.Event()
+    samples: list = []
+    probe_task = asyncio.create_task(probe(stop, samples))
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe_task
+    return elapsed, samples
+
+
+def report(label: str, logins: int, elapsed: float, samples: list):
+    print(
+        f"{label:<14} {logins / elapsed:8.1f} logins/s   "
+        f"other-endpoint p50 {statistics.median(samples):7.2f} ms   "
+        f"p99 {percentile(samples, 99):8.2f} ms   "
+        f"max {max(samples):8.2f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    context = build_context(args.rounds)
+    password = "correct horse battery staple"
+    hashed = context.hash(password)
+
+    print(f"{args.logins} logins, concurrency {args.concurrency}, bcrypt cost {args.rounds}, {args.workers} workers\n")
+
+    async def verify_inline():
+        return context.verify(password, hashed)
+
+    elapsed, samples = await run_storm(verify_inline, args.logins, args.concurrency)
+    report("inline", args.logins, elapsed, samples)
+
+    hasher = PasswordHasher(rounds=args.rounds, max_workers=args.workers)
+    await hasher.verify(password, hashed)  # spawn workers outside the timed run
+    try:
+        elapsed, samples = await run_storm(
+            lambda: hasher.verify(password, hashed), args.logins, args.concurrency
+        )
+        report("process pool", args.logins, elapsed, samples)
+    finally:
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+# backend/benchmarks/bench_serialization.py
+"""
+List endpoint serialization microbenchmark
+
+Compares, for a 1,000-item listing response:
+  validated  - the old path: fromisoformat + Listing(**doc) per item, then
+               FastAPI's response_model pass (model_dump, validate the list
+               again, serialize to JSON-able data, json.dumps)
+  trusted    - utils.serialization.trusted_json_response
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [--items 1000] [--runs 50]
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from models import Listing  # noqa: E402
+from utils import serialization  # noqa: E402
+from utils.serialization import trusted_json_response  # noqa: E402
+
+response_adapter = TypeAdapter(List[Listing])
+
+
+def stored_listing(i: int, now: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "seller_id": str(uuid.uuid4()),
+        "seller_name": f"Seller {i}",
+        "title": f"Handmade ceramic mug #{i}",
+        "description": "Wheel-thrown stoneware mug, dishwasher safe, 350ml. " * 3,
+        "price": 24.5 + i % 50,
+        "category": "Home",
+        "images": [f"http://localhost:8000/uploads/{uuid.uuid4()}.jpg"],
+        "tags": ["ceramic", "mug", "handmade"],
+        "stock": i % 20,
+        "verified": bool(i % 2),
+        "rating": 4.2,
+        "reviews_count": i % 300,
+        "type": "product",
+        "timestamp": (now - timedelta(minutes=i)).isoformat(),
+    }
+
+
+def validated_path(docs: List[dict]) -> bytes:
+    listings = []
+    for p in docs:
+        p = dict(p)
+        if isinstance(p.get("timestamp"), str):
+            p["created_at"] = datetime.fromisoformat(p.pop("timestamp"))
+        listings.append(Listing(**p))
+    # What FastAPI does with response_model=List[Listing]
+    content = [listing.model_dump() for listing in listings]
+    value = response_adapter.validate_python(content)
+    return json.dumps(response_adapter.dump_python(value, mode="json")).encode()
+
+
+def trusted_path(docs: List[dict]) -> bytes:
+    return trusted_json_response(docs, Listing).body
+
+
+def measure(fn, docs, runs: int) -> float:
+    fn(docs)  # warm up
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(docs)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    docs = [stored_listing(i, now) for i in range(args.items)]
+
+    print(f"{args.items} listings per response, median of {args.runs} runs "
+          f"(orjson {'on' if serialization.orjson else 'off'})\n")
+    baseline = None
+    for label, fn in (("validated", validated_path), ("trusted", trusted_path)):
+        total = measure(fn, docs, args.runs)
+        per_item_us = total / args.items * 1e6
+        baseline = baseline or total
+        print(f"{label:<10} {total * 1000:8.2f} ms/response   {per_item_us:7.2f} us/item   {baseline / total:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# backend/benchmarks/bench_stock_reservation.py
+"""
+Flash-sale benchmark: --buyers concurrent buyers racing for one SKU
+
+Runs the same stampede two ways against a listing seeded with --stock units:
+  check-then-act - the old create_order: read stock, compare, and decrement
+                   later with an unconditional $inc
+  reserve        - services.inventory_service.reserve_stock: one conditional
+                   $inc guarded by stock >= quantity, plus the hold record
+and reports orders accepted, final stock, units oversold, throughput and
+per-buyer latency. Correct runs accept exactly --stock orders and end at 0.
+
+Requires a MongoDB at MONGO_URL. Uses database `<DB_NAME>_bench`; the
+listing and reservation collections are reset for every round.
+
+Usage (from backend/):
+    python -m benchmarks.bench_stock_reservation [--buyers 1000] [--stock 100] [--rounds 3]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+from config import settings  # noqa: E402
+import database  # noqa: E402
+from services import inventory_service  # noqa: E402
+
+LISTING_ID = "bench-sku"
+
+
+async def reset(db, stock: int):
+    await db.listings.delete_many({"id": LISTING_ID})
+    await db.stock_reservations.delete_many({})
+    await db.listings.insert_one({"id": LISTING_ID, "type": "product", "title": "Flash sale item", "stock": stock})
+
+
+async def check_then_act(db, quantity: int) -> bool:
+    listing = await db.listings.find_one({"id": LISTING_ID}, {"_id": 0, "stock": 1})
+    if listing.get("stock", 0) < quantity:
+        return False
+    await db.listings.update_one({"id": LISTING_ID}, {"$inc": {"stock": -quantity}})
+    return True
+
+
+async def reserve(db, quantity: int) -> bool:
+    return await inventory_service.reserve_stock(LISTING_ID, quantity, str(uuid.uuid4()), "bench-buyer")
+
+
+async def stampede(db, label: str, attempt, buyers: int, stock: int):
+    await reset(db, stock)
+    latencies = []
+
+    async def buyer():
+        started = time.perf_counter()
+        accepted = await attempt(db, 1)
+        latencies.append(time.perf_counter() - started)
+        return accepted
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(buyer() for _ in range(buyers)))
+    elapsed = time.perf_counter() - started
+
+    accepted = sum(results)
+    final = (await db.listings.find_one({"id": LISTING_ID}))["stock"]
+    latencies.sort()
+    print(f"{label:<15} accepted {accepted:5d}  final stock {final:5d}  oversold {max(0, accepted - stock):5d}  "
+          f"{buyers / elapsed:8.0f} buyers/s  p50 {statistics.median(latencies) * 1000:6.1f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:6.1f} ms")
+
+
+async def main(args):
+    client = AsyncIOMotorClient(settings.MONGO_URL, maxPoolSize=args.pool_size)
+    db = client[f"{settings.DB_NAME}_bench"]
+    database.database.db = db  # inventory_service reads through get_db()
+    await db.listings.create_index("id", unique=True)
+    await db.stock_reservations.create_index("order_id", unique=True)
+
+    print(f"{args.buyers} buyers, {args.stock} units, pool {args.pool_size}\n")
+    for _ in range(args.rounds):
+        await stampede(db, "check-then-act", check_then_act, args.buyers, args.stock)
+        await stampede(db, "reserve", reserve, args.buyers, args.stock)
+
+    await db.listings.delete_many({"id": LISTING_ID})
+    await db.stock_reservations.delete_many({})
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buyers", type=int, default=1000)
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--pool-size", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
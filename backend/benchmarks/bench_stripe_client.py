@@ -0,0 +1,115 @@
+# backend/benchmarks/bench_stripe_client.py
+"""
+Checkout-session throughput and event-loop stalls: sync SDK vs PaymentsClient
+
+Starts benchmarks.stripe_stub in-process on a local port, then creates
+--sessions checkout sessions with --concurrency in-flight tasks two ways:
+  sync-sdk   - stripe.checkout.Session.create called inside async tasks (the old
+               route code); every call blocks the event loop
+  async      - services.payments.PaymentsClient over pooled httpx.AsyncClient
+A 10 ms ticker runs alongside and reports the worst event-loop lag, which
+is how long every other request on the server would have stalled.
+
+Usage (from backend/):
+    python -m benchmarks.bench_stripe_client [--sessions 200] [--concurrency 50] [--latency-ms 100]
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import stripe  # noqa: E402
+import uvicorn  # noqa: E402
+
+from benchmarks.stripe_stub import create_app  # noqa: E402
+from services.payments import PaymentsClient  # noqa: E402
+
+API_KEY = "sk_test_stub"
+
+PARAMS = {
+    "line_items": [{
+        "price_data": {"currency": "usd", "product_data": {"name": "Bench item"}, "unit_amount": 1999},
+        "quantity": 1,
+    }],
+    "mode": "payment",
+    "success_url": "http://localhost/success?session_id={CHECKOUT_SESSION_ID}",
+    "cancel_url": "http://localhost/cancel",
+    "metadata": {"order_id": "bench"},
+}
+
+
+def start_stub(port: int, latency: float) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(create_app(latency), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def measure(create, sessions: int, concurrency: int) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+    worst_lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst_lag
+        while not done:
+            expected = time.perf_counter() + 0.01
+            await asyncio.sleep(0.01)
+            worst_lag = max(worst_lag, time.perf_counter() - expected)
+
+    async def one():
+        async with semaphore:
+            await create()
+
+    tick = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(sessions)))
+    elapsed = time.perf_counter() - started
+    done = True
+    await tick
+    return elapsed, worst_lag
+
+
+async def run(args, api_base: str):
+    stripe.api_key = API_KEY
+    stripe.api_base = api_base
+
+    async def sync_create():
+        stripe.checkout.Session.create(**PARAMS)
+
+    client = PaymentsClient(API_KEY, api_base=api_base)
+
+    async def async_create():
+        await client.create_checkout_session(PARAMS)
+
+    await async_create()  # warm the connection pool
+    for label, create in (("sync-sdk", sync_create), ("async", async_create)):
+        elapsed, lag = await measure(create, args.sessions, args.concurrency)
+        print(f"{label:<9} {args.sessions / elapsed:8.1f} sessions/s   worst event-loop stall {lag * 1000:8.1f} ms")
+    await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--port", type=int, default=12111)
+    args = parser.parse_args()
+
+    server = start_stub(args.port, args.latency_ms / 1000)
+    print(f"Stripe stub on :{args.port} ({args.latency_ms:.0f} ms latency), "
+          f"{args.sessions} sessions, concurrency {args.concurrency}\n")
+    try:
+        asyncio.run(run(args, f"http://127.0.0.1:{args.port}"))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
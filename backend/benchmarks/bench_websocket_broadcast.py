@@ -0,0 +1,106 @@
+# backend/benchmarks/bench_websocket_broadcast.py
+"""
+WebSocket broadcast latency vs. connection count, with one slow client
+
+Broadcasts --messages chat-sized messages to N in-process fake sockets
+(N from --connections), one of which takes --slow-ms per send, two ways:
+  sequential - the old ConnectionManager.broadcast: json.dumps and an
+               awaited send_text per socket, one after another
+  queued     - utils.websocket_manager.ConnectionManager: one serialization,
+               per-connection queues drained by writer tasks
+and reports how long the broadcast call takes and how long until every
+fast client has the frame. Fake sockets yield to the event loop on each
+send, so the numbers are the manager's overhead, not network time.
+
+Usage (from backend/):
+    python -m benchmarks.bench_websocket_broadcast [--connections 100,1000,5000] [--messages 20] [--slow-ms 50]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.websocket_manager import ConnectionManager  # noqa: E402
+
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received = 0
+        self.waiter = None
+
+    async def accept(self):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+    async def send_text(self, data: str):
+        await asyncio.sleep(self.delay)
+        self.received += 1
+        if self.waiter is not None and not self.waiter.done():
+            self.waiter.set_result(time.perf_counter())
+
+
+def message(i: int) -> dict:
+    return {"type": "chat", "data": {"id": str(i), "sender_id": "bench", "message": "x" * 1000}}
+
+
+async def sequential_broadcast(sockets: list, msg: dict):
+    for socket in sockets:
+        await socket.send_text(json.dumps(msg))
+
+
+async def run(label: str, sockets: list, broadcast, messages: int) -> tuple:
+    fast = [s for s in sockets if not s.delay]
+    call_times, delivery_times = [], []
+    for i in range(messages):
+        loop = asyncio.get_running_loop()
+        for s in fast:
+            s.waiter = loop.create_future()
+        started = time.perf_counter()
+        await broadcast(message(i))
+        call_times.append(time.perf_counter() - started)
+        done = await asyncio.gather(*(s.waiter for s in fast))
+        delivery_times.append(max(done) - started)
+    return statistics.median(call_times), statistics.median(delivery_times)
+
+
+async def bench(count: int, messages: int, slow: float):
+    sockets = [FakeSocket(slow)] + [FakeSocket() for _ in range(count - 1)]
+    seq = await run("sequential", sockets, lambda m: sequential_broadcast(sockets, m), messages)
+
+    sockets = [FakeSocket(slow)] + [FakeSocket() for _ in range(count - 1)]
+    manager = ConnectionManager(queue_size=messages + 1)
+
+    async def quiet():
+        pass
+    manager.broadcast_online_users = quiet  # skip the O(N^2) presence fan-out while connecting
+    for i, socket in enumerate(sockets):
+        await manager.connect(socket, f"user-{i}")
+    queued = await run("queued", sockets, manager.broadcast, messages)
+    await manager.shutdown()
+
+    for label, (call, delivery) in (("sequential", seq), ("queued", queued)):
+        print(f"{count:6d} conns  {label:<10}  broadcast call {call * 1000:8.2f} ms   "
+              f"all fast clients served {delivery * 1000:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", default="100,1000,5000")
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--slow-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    for count in (int(c) for c in args.connections.split(",")):
+        asyncio.run(bench(count, args.messages, args.slow_ms / 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# backend/benchmarks/stripe_stub.py
+"""
+Local Stripe-compatible stub for offline checkout load tests
+
+Implements just what NovoMarket calls:
+  POST /v1/checkout/sessions           -> create an "open"/"unpaid" session
+  GET  /v1/checkout/sessions/{id}      -> retrieve it
+and a control endpoint for tests:
+  POST /_stub/sessions/{id}/pay        -> mark paid and, with --webhook-url,
+                                          deliver a signed checkout.session.completed
+
+Every API call waits --latency-ms (Stripe's own p50 is a few hundred ms)
+and fails with a retryable 500 at --error-rate, to exercise client retries.
+
+Usage (from backend/):
+    python -m benchmarks.stripe_stub [--port 12111] [--latency-ms 250] [--error-rate 0]
+        [--webhook-url http://localhost:8000/api/webhook/stripe --webhook-secret whsec_test]
+then start the backend with STRIPE_API_BASE=http://localhost:12111 STRIPE_API_KEY=sk_test_stub
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import re
+import time
+import uuid
+from typing import Dict, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+_BRACKET_RE = re.compile(r"\[([^\]]*)\]")
+
+
+def parse_stripe_form(form) -> dict:
+    """Decode Stripe's bracketed form encoding (a[b][0][c]=v) into nested data"""
+    root: dict = {}
+    for key, value in form.multi_items():
+        head = key.split("[", 1)[0]
+        path = [head] + _BRACKET_RE.findall(key)
+        node = root
+        for part in path[:-1]:
+            node = node.setdefault(part, {})
+        node[path[-1]] = value
+    return root
+
+
+def stripe_error(status: int, message: str) -> JSONResponse:
+    return JSONResponse(status_code=status, content={"error": {"type": "api_error", "message": message}})
+
+
+def create_app(
+    latency: float = 0.25,
+    error_rate: float = 0.0,
+    webhook_url: Optional[str] = None,
+    webhook_secret: Optional[str] = None
+) -> FastAPI:
+    app = FastAPI(title="Stripe stub")
+    sessions: Dict[str, dict] = {}
+    stats = {"created": 0, "retrieved": 0, "errors": 0}
+
+    async def simulate():
+        if latency:
+            await asyncio.sleep(latency)
+        if error_rate and random.random() < error_rate:
+            stats["errors"] += 1
+            return stripe_error(500, "Stub injected failure")
+        return None
+
+    @app.post("/v1/checkout/sessions")
+    async def create_session(request: Request):
+        failure = await simulate()
+        if failure:
+            return failure
+        params = parse_stripe_form(await request.form())
+        session_id = f"cs_test_{uuid.uuid4().hex}"
+        line_items = list((params.get("line_items") or {}).values())
+        amount_total = sum(
+            int(item.get("price_data", {}).get("unit_amount", 0)) * int(item.get("quantity", 1))
+            for item in line_items
+        )
+        session = {
+            "id": session_id,
+            "object": "checkout.session",
+            "url": f"https://checkout.stripe.test/pay/{session_id}",
+            "mode": params.get("mode", "payment"),
+            "status": "open",
+            "payment_status": "unpaid",
+            "amount_total": amount_total,
+            "currency": "usd",
+            "metadata": params.get("metadata", {}),
+            "success_url": params.get("success_url"),
+            "cancel_url": params.get("cancel_url"),
+            "created": int(time.time()),
+            "livemode": False,
+        }
+        sessions[session_id] = session
+        stats["created"] += 1
+        return session
+
+    @app.get("/v1/checkout/sessions/{session_id}")
+    async def retrieve_session(session_id: str):
+        failure = await simulate()
+        if failure:
+            return failure
+        session = sessions.get(session_id)
+        if session is None:
+            return stripe_error(404, f"No such checkout.session: '{session_id}'")
+        stats["retrieved"] += 1
+        return session
+
+    @app.post("/_stub/sessions/{session_id}/pay")
+    async def pay_session(session_id: str):
+        session = sessions.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Unknown session")
+        session.update(status="complete", payment_status="paid")
+        delivered = None
+        if webhook_url and webhook_secret:
+            delivered = await deliver_webhook(session)
+        return {"session": session, "webhook_status": delivered}
+
+    @app.get("/_stub/stats")
+    async def get_stats():
+        return {**stats, "sessions": len(sessions)}
+
+    async def deliver_webhook(session: dict) -> int:
+        event = {
+            "id": f"evt_{uuid.uuid4().hex}",
+            "object": "event",
+            "type": "checkout.session.completed",
+            "created": int(time.time()),
+            "data": {"object": session},
+        }
+        payload = json.dumps(event)
+        timestamp = int(time.time())
+        signature = hmac.new(
+            webhook_secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256
+        ).hexdigest()
+        async with httpx.AsyncClient() as client:
+            response = await client.post(
+                webhook_url,
+                content=payload,
+                headers={"content-type": "application/json", "stripe-signature": f"t={timestamp},v1={signature}"},
+            )
+        return response.status_code
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--latency-ms", type=float, default=250)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--webhook-url")
+    parser.add_argument("--webhook-secret")
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms / 1000, args.error_rate, args.webhook_url, args.webhook_secret)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
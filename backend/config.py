@@ -26,10 +26,56 @@ class Settings:
     JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
     JWT_ALGORITHM = os.environ.get('JWT_ALGORITHM', 'HS256')
     JWT_EXPIRATION_DAYS = int(os.getenv('JWT_EXPIRATION_DAYS', '7'))
+    # Embed name/role/verified in tokens so auth needs no DB read (opt-in)
+    JWT_STATELESS_CLAIMS = os.getenv('JWT_STATELESS_CLAIMS', 'False') == 'True'
+    TOKEN_VERSION_REFRESH_SECONDS = int(os.getenv('TOKEN_VERSION_REFRESH_SECONDS', '30'))
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+    
+    # Caching
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+    USER_CACHE_TTL_SECONDS = int(os.getenv('USER_CACHE_TTL_SECONDS', '60'))
+    LISTING_CACHE_SIZE = int(os.getenv('LISTING_CACHE_SIZE', '5000'))
+    LISTING_CACHE_TTL_SECONDS = int(os.getenv('LISTING_CACHE_TTL_SECONDS', '30'))
+    FACET_CACHE_TTL_SECONDS = int(os.getenv('FACET_CACHE_TTL_SECONDS', '15'))
+
+    # Search: "mongo" (text index) or "memory" (in-process BM25 index)
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'mongo')
+    SEARCH_INDEX_REBUILD_SECONDS = int(os.getenv('SEARCH_INDEX_REBUILD_SECONDS', '300'))
+    SUGGEST_INDEX_REBUILD_SECONDS = int(os.getenv('SUGGEST_INDEX_REBUILD_SECONDS', '300'))
+
+    # Listing view counters: flush interval and most unflushed counts held (the loss bound)
+    VIEW_COUNTER_FLUSH_SECONDS = float(os.getenv('VIEW_COUNTER_FLUSH_SECONDS', '5'))
+    VIEW_COUNTER_MAX_PENDING = int(os.getenv('VIEW_COUNTER_MAX_PENDING', '50000'))
+
+    # WebSocket fan-out: frames queued per connection before it is dropped as a
+    # slow consumer, and how long a send may stall before the next frame drops it
+    WS_SEND_QUEUE_SIZE = int(os.getenv('WS_SEND_QUEUE_SIZE', '256'))
+    WS_SEND_TIMEOUT_SECONDS = float(os.getenv('WS_SEND_TIMEOUT_SECONDS', '10'))
     
     # Stripe
     STRIPE_API_KEY = os.environ.get('STRIPE_API_KEY')
     STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
+    # Point at a Stripe-compatible stub (e.g. benchmarks/stripe_stub.py) for offline load tests
+    STRIPE_API_BASE = os.getenv('STRIPE_API_BASE')
+    STRIPE_TIMEOUT_SECONDS = float(os.getenv('STRIPE_TIMEOUT_SECONDS', '10'))
+    STRIPE_MAX_NETWORK_RETRIES = int(os.getenv('STRIPE_MAX_NETWORK_RETRIES', '2'))
+    # How long a fetched checkout-session status is reused for status polls
+    STRIPE_SESSION_CACHE_SECONDS = float(os.getenv('STRIPE_SESSION_CACHE_SECONDS', '3'))
+    # Webhook event queue: consumer poll interval, batch size, retries and retention
+    STRIPE_EVENT_POLL_SECONDS = float(os.getenv('STRIPE_EVENT_POLL_SECONDS', '1'))
+    STRIPE_EVENT_BATCH_SIZE = int(os.getenv('STRIPE_EVENT_BATCH_SIZE', '200'))
+    STRIPE_EVENT_MAX_ATTEMPTS = int(os.getenv('STRIPE_EVENT_MAX_ATTEMPTS', '5'))
+    STRIPE_EVENT_CLAIM_TIMEOUT_SECONDS = int(os.getenv('STRIPE_EVENT_CLAIM_TIMEOUT_SECONDS', '300'))
+    STRIPE_EVENT_RETENTION_DAYS = int(os.getenv('STRIPE_EVENT_RETENTION_DAYS', '30'))
+    # Checkout session lifetime (Stripe accepts 30 minutes to 24 hours)
+    CHECKOUT_SESSION_TTL_SECONDS = int(os.getenv('CHECKOUT_SESSION_TTL_SECONDS', '3600'))
+    
+    # Stock reservations: hold time before checkout, sweep interval, and how
+    # long finished reservation records are kept
+    STOCK_RESERVATION_TTL_SECONDS = int(os.getenv('STOCK_RESERVATION_TTL_SECONDS', '900'))
+    STOCK_RESERVATION_SWEEP_SECONDS = int(os.getenv('STOCK_RESERVATION_SWEEP_SECONDS', '60'))
+    STOCK_RESERVATION_RETENTION_SECONDS = int(os.getenv('STOCK_RESERVATION_RETENTION_SECONDS', '604800'))
     
     # Email (Optional)
     SMTP_HOST = os.getenv('SMTP_HOST', 'smtp.gmail.com')
@@ -44,6 +90,27 @@ class Settings:
     # File Upload
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
     UPLOAD_DIR = ROOT_DIR / "uploads"
+    # Partial uploads; must be on the same filesystem as UPLOAD_DIR
+    UPLOAD_TMP_DIR = ROOT_DIR / "uploads_tmp"
+    UPLOAD_URL_PREFIX = os.getenv('UPLOAD_URL_PREFIX', 'http://localhost:8000/uploads/')
+    # Stored files with no listing or message using them are deleted after this grace period
+    UPLOAD_GC_GRACE_SECONDS = int(os.getenv('UPLOAD_GC_GRACE_SECONDS', '86400'))
+    UPLOAD_GC_SWEEP_SECONDS = int(os.getenv('UPLOAD_GC_SWEEP_SECONDS', '3600'))
+    # Chunked (resumable) uploads for large attachments
+    CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv('CHUNKED_UPLOAD_MAX_SIZE', str(1024 * 1024 * 1024)))  # 1GB
+    CHUNKED_UPLOAD_PART_SIZE = int(os.getenv('CHUNKED_UPLOAD_PART_SIZE', str(8 * 1024 * 1024)))  # 8MB
+    CHUNKED_UPLOAD_TTL_SECONDS = int(os.getenv('CHUNKED_UPLOAD_TTL_SECONDS', '86400'))
+    CHUNKED_UPLOAD_SWEEP_SECONDS = int(os.getenv('CHUNKED_UPLOAD_SWEEP_SECONDS', '900'))
+    # An "assembling" session older than this is assumed dead and reopened
+    CHUNKED_UPLOAD_ASSEMBLE_TIMEOUT_SECONDS = int(os.getenv('CHUNKED_UPLOAD_ASSEMBLE_TIMEOUT_SECONDS', '3600'))
+    # Image derivatives (thumbnail widths + WebP); needs Pillow, 0 workers disables
+    IMAGE_DERIVATIVE_WIDTHS = [int(w) for w in os.getenv('IMAGE_DERIVATIVE_WIDTHS', '320,640,1280').split(',')]
+    IMAGE_DERIVATIVE_WORKERS = int(os.getenv('IMAGE_DERIVATIVE_WORKERS', '2'))
+    IMAGE_DERIVATIVE_QUALITY = int(os.getenv('IMAGE_DERIVATIVE_QUALITY', '80'))
+    
+    # Bulk listing import
+    BULK_IMPORT_BATCH_SIZE = int(os.getenv('BULK_IMPORT_BATCH_SIZE', '500'))
+    BULK_IMPORT_MAX_ROWS = int(os.getenv('BULK_IMPORT_MAX_ROWS', '100000'))
     
     # Frontend URL
     FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
@@ -63,4 +130,5 @@ settings = Settings()
 settings.validate()
 
 # Create upload directory
-settings.UPLOAD_DIR.mkdir(exist_ok=True)
\ No newline at end of file
+settings.UPLOAD_DIR.mkdir(exist_ok=True)
+settings.UPLOAD_TMP_DIR.mkdir(exist_ok=True)
\ No newline at end of file
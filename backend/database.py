@@ -189,6 +189,7 @@ async def init_indexes():
         await db.users.create_index("email", unique=True)
         await db.users.create_index("id", unique=True)
         await db.users.create_index("role")
+        await db.users.create_index("token_version", sparse=True)
         logger.info("✅ Users indexes created")
         
         # Listings indexes
@@ -199,6 +200,13 @@ async def init_indexes():
         await db.listings.create_index([("title", "text"), ("description", "text")])
         await db.listings.create_index("rating")
         await db.listings.create_index("timestamp")
+        # Keyset pagination for each browse sort, with and without a category filter
+        await db.listings.create_index([("timestamp", -1), ("id", -1)])
+        await db.listings.create_index([("rating", -1), ("id", -1)])
+        await db.listings.create_index([("price", 1), ("id", 1)])
+        await db.listings.create_index([("category", 1), ("timestamp", -1), ("id", -1)])
+        await db.listings.create_index([("category", 1), ("rating", -1), ("id", -1)])
+        await db.listings.create_index([("category", 1), ("price", 1), ("id", 1)])
         logger.info("✅ Listings indexes created")
         
         # Bookings indexes
@@ -230,6 +238,10 @@ async def init_indexes():
         await db.reviews.create_index("listing_id")
         await db.reviews.create_index("user_id")
         await db.reviews.create_index("timestamp")
+        # Paged review lists per listing (keyset on the sort fields + id)
+        await db.reviews.create_index([("listing_id", 1), ("timestamp", -1), ("id", -1)])
+        await db.reviews.create_index([("listing_id", 1), ("rating", -1), ("timestamp", -1), ("id", -1)])
+        await db.reviews.create_index([("listing_id", 1), ("rating", 1), ("timestamp", -1), ("id", -1)])
         logger.info("✅ Reviews indexes created")
         
         # Orders indexes
@@ -239,6 +251,11 @@ async def init_indexes():
         await db.orders.create_index("listing_id")
         await db.orders.create_index("status")
         await db.orders.create_index("timestamp")
+        # Paged order history per buyer/seller, optionally filtered by status
+        await db.orders.create_index([("buyer_id", 1), ("timestamp", -1), ("id", -1)])
+        await db.orders.create_index([("seller_id", 1), ("timestamp", -1), ("id", -1)])
+        await db.orders.create_index([("buyer_id", 1), ("status", 1), ("timestamp", -1), ("id", -1)])
+        await db.orders.create_index([("seller_id", 1), ("status", 1), ("timestamp", -1), ("id", -1)])
         logger.info("✅ Orders indexes created")
         
         # Messages indexes
@@ -268,6 +285,27 @@ async def init_indexes():
         await db.payment_transactions.create_index("payment_status")
         logger.info("✅ Payment transactions indexes created")
         
+        # Stripe webhook event queue; done events expire after the retention window
+        await db.stripe_events.create_index("event_id", unique=True)
+        await db.stripe_events.create_index([("status", 1), ("received_at", 1)])
+        await db.stripe_events.create_index("session_id")
+        await db.stripe_events.create_index("expire_at", expireAfterSeconds=0)
+        logger.info("✅ Stripe events indexes created")
+        
+        # Stock reservations; finished ones are purged after the retention window
+        await db.stock_reservations.create_index("id", unique=True)
+        await db.stock_reservations.create_index("order_id", unique=True)
+        await db.stock_reservations.create_index([("status", 1), ("expires_at", 1)])
+        await db.stock_reservations.create_index("purge_at", expireAfterSeconds=0)
+        logger.info("✅ Stock reservations indexes created")
+        
+        # Content-addressed uploads
+        await db.uploads.create_index("hash", unique=True)
+        await db.uploads.create_index([("usage_counted", 1), ("ref_count", 1), ("referenced_at", 1)])
+        await db.chunked_uploads.create_index("id", unique=True)
+        await db.chunked_uploads.create_index([("status", 1), ("expires_at", 1)])
+        logger.info("✅ Uploads indexes created")
+        
         logger.info("🎉 All database indexes initialized successfully!")
         
     except Exception as e:
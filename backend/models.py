@@ -99,11 +99,16 @@ class Listing(BaseModel):
     price: float
     category: str
     images: List[str] = []
+    # Per image: {"w320": url, ..., "webp": url}, or {} for external images
+    image_variants: List[Dict[str, str]] = []
     tags: List[str] = []
     stock: Optional[int] = 1
     verified: bool = False
     rating: float = 0.0
     reviews_count: int = 0
+    # Review count per star, "1".."5"; stars nobody gave may be absent
+    rating_histogram: Dict[str, int] = {}
+    views: int = 0
     type: str = "product"
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
@@ -149,6 +154,13 @@ class ReviewCreate(BaseModel):
     comment: str
 
 
+class ReviewSummary(BaseModel):
+    listing_id: str
+    rating: float = 0.0
+    reviews_count: int = 0
+    histogram: Dict[str, int]
+
+
 # ============ ORDER MODELS ============
 
 class Order(BaseModel):
@@ -166,9 +178,23 @@ class Order(BaseModel):
     session_id: Optional[str] = None
     shipping_address: Optional[str] = None
     tracking_number: Optional[str] = None
+    stock_state: Optional[str] = None  # reserved | committed | released | untracked
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
+class OrderStatusSummary(BaseModel):
+    count: int = 0
+    amount: float = 0.0
+
+
+class OrderSummary(BaseModel):
+    total_orders: int = 0
+    total_amount: float = 0.0
+    paid_amount: float = 0.0
+    by_status: Dict[str, OrderStatusSummary] = {}
+    by_payment_status: Dict[str, OrderStatusSummary] = {}
+
+
 class OrderCreate(BaseModel):
     listing_id: str
     quantity: int = 1
@@ -311,6 +337,7 @@ class PaymentTransaction(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     session_id: str
     order_id: str
+    order_ids: List[str] = []  # every order paid by this session (cart checkout)
     buyer_id: str
     amount: float
     currency: str = "usd"
@@ -325,9 +352,25 @@ class CheckoutSessionResponse(BaseModel):
     url: str
 
 
+class CartItem(BaseModel):
+    listing_id: str
+    quantity: int = Field(1, ge=1)
+
+
+class CartCheckout(BaseModel):
+    items: List[CartItem] = Field(..., min_length=1, max_length=50)
+    shipping_address: Optional[str] = None
+
+
+class CartCheckoutResponse(CheckoutSessionResponse):
+    """Response model for cart checkout: one session paying several orders"""
+    order_ids: List[str]
+
+
 class CheckoutStatusResponse(BaseModel):
     """Response model for checkout status check"""
     payment_status: str
+    status: Optional[str] = None  # Stripe session status: open | complete | expired
 
 
 # ============ ANALYTICS MODELS ============
@@ -4,31 +4,73 @@ NovoMarket Marketplace Routes - All Issues Fixed
 Location: backend/routes/marketplace.py
 """
 
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request, Response, Query
 from typing import List, Optional
-import uuid
-import shutil
 from datetime import datetime, timezone, timedelta
-from pathlib import Path
 
 from database import get_db
-from utils.auth_utils import get_current_user, hash_password, verify_password, create_access_token
+from utils.auth_utils import (
+    get_current_user, get_user_by_id, hash_password_async, verify_password_async,
+    create_access_token, token_claims, revoke_user_tokens
+)
 from config import settings
+from utils.pagination import decode_cursor, cursor_for, keyset_filter
+from utils.cache import TTLCache
+from utils.serialization import trusted_dump, trusted_json_response, dumps
+from services.search_index import search_index
+from services.suggest_index import suggest_index
+from services.view_counter import view_counter
+from services.upload_storage import (
+    add_references, image_changes, release_references, store_upload, upload_url
+)
+from services.image_derivatives import image_variants
+from services.listing_import import stream_records, run_bulk, bulk_write_batch
 from models import (
     User, UserCreate, UserLogin,
     Listing, ListingCreate, ListingUpdate,
-    Review, ReviewCreate,
-    Order,
+    Review, ReviewCreate, ReviewSummary,
+    Order, OrderSummary, OrderStatusSummary,
     Message,
     Wishlist,
-    PaymentTransaction, CheckoutSessionResponse, CheckoutStatusResponse
+    PaymentTransaction, CheckoutSessionResponse, CheckoutStatusResponse,
+    CartCheckout, CartCheckoutResponse
 )
 
-import stripe
-stripe.api_key = settings.STRIPE_API_KEY
+from pymongo import InsertOne, UpdateOne
+
+from services.payments import payments
+from services.stripe_events import ingest_event, apply_paid_sessions
+from services import inventory_service
 
 router = APIRouter()
 
+# ============ LISTING SYNC HOOKS ============
+
+# Serialized GET /listings/{id} payloads; TTL bounds staleness across workers
+listing_cache = TTLCache(
+    "listings",
+    maxsize=settings.LISTING_CACHE_SIZE,
+    ttl=settings.LISTING_CACHE_TTL_SECONDS
+)
+
+def invalidate_listing(listing_id: str):
+    """Drop cached payloads after any write to a listing document"""
+    listing_cache.invalidate(listing_id)
+
+def sync_listing(listing_doc: dict):
+    """Propagate a created or updated listing to in-process indexes"""
+    invalidate_listing(listing_doc['id'])
+    suggest_index.upsert(listing_doc)
+    if settings.SEARCH_BACKEND == "memory":
+        search_index.upsert(listing_doc)
+
+def drop_listing(listing_id: str):
+    """Remove a deleted listing from in-process indexes"""
+    invalidate_listing(listing_id)
+    suggest_index.remove(listing_id)
+    if settings.SEARCH_BACKEND == "memory":
+        search_index.remove(listing_id)
+
 # ============ AUTH ROUTES ============
 
 @router.post("/auth/register")
@@ -47,11 +89,11 @@ async def register(user_data: UserCreate):
     
     user_dict = user.model_dump()
     user_dict['timestamp'] = user_dict.pop('created_at').isoformat()
-    user_dict['password'] = hash_password(user_data.password)
+    user_dict['password'] = await hash_password_async(user_data.password)
     
     await db.users.insert_one(user_dict)
     
-    token = create_access_token({"user_id": user.id, "email": user.email})
+    token = create_access_token(token_claims(user_dict))
     return {"token": token, "user": user.model_dump()}
 
 @router.post("/auth/login")
@@ -59,20 +101,27 @@ async def login(credentials: UserLogin):
     """Login user"""
     db = get_db()
     user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user or not verify_password(credentials.password, user.get('password', '')):
+    if not user or not await verify_password_async(credentials.password, user.get('password', '')):
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     user.pop('password', None)
     if isinstance(user.get('timestamp'), str):
         user['created_at'] = datetime.fromisoformat(user.pop('timestamp'))
     
-    token = create_access_token({"user_id": user['id'], "email": user['email']})
+    token = create_access_token(token_claims(user))
     return {"token": token, "user": User(**user).model_dump()}
 
 @router.get("/auth/me", response_model=User)
 async def get_me(current_user: User = Depends(get_current_user)):
     """Get current user info"""
-    return current_user
+    # Stateless tokens only carry a subset of the profile
+    return await get_user_by_id(current_user.id)
+
+@router.post("/auth/revoke-tokens")
+async def revoke_tokens(current_user: User = Depends(get_current_user)):
+    """Sign out everywhere by invalidating all existing tokens"""
+    await revoke_user_tokens(current_user.id)
+    return {"message": "All sessions revoked"}
 
 # ============ LISTING ROUTES ============
 
@@ -88,46 +137,408 @@ async def create_listing(listing_data: ListingCreate, current_user: User = Depen
         seller_name=current_user.name,
         **listing_data.model_dump()
     )
+    listing.image_variants = image_variants(listing.images)
     
     listing_dict = listing.model_dump()
     listing_dict['timestamp'] = listing_dict.pop('created_at').isoformat()
     
     await db.listings.insert_one(listing_dict)
+    sync_listing(listing_dict)
+    await add_references(listing.images)
     return listing
 
-@router.get("/listings", response_model=List[Listing])
-async def get_listings(category: Optional[str] = None, search: Optional[str] = None, limit: int = 50):
-    """Get all listings with optional filters"""
+def bulk_format(request: Request, format: Optional[str]) -> str:
+    """Body format from ?format= or the Content-Type header"""
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    return fmt
+
+@router.post("/listings/bulk")
+async def bulk_import_listings(
+    request: Request,
+    format: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Import many listings from a streamed CSV or NDJSON body
+
+    Each row is validated as ListingCreate and written in unordered
+    bulk_write batches, so memory stays bounded however large the catalog.
+    Returns counts plus a per-row error report; valid rows are imported
+    even when others fail.
+    """
+    if current_user.role != "seller":
+        raise HTTPException(status_code=403, detail="Only sellers can create listings")
+    
+    fmt = bulk_format(request, format)
+    db = get_db()
+    
+    def build_op(record: dict) -> dict:
+        listing = Listing(
+            seller_id=current_user.id,
+            seller_name=current_user.name,
+            **ListingCreate(**record).model_dump()
+        )
+        listing.image_variants = image_variants(listing.images)
+        listing_dict = listing.model_dump()
+        listing_dict['timestamp'] = listing_dict.pop('created_at').isoformat()
+        return listing_dict
+    
+    async def flush(batch, report):
+        failed = set(await bulk_write_batch(
+            db.listings, [(row, InsertOne(doc)) for row, doc in batch], report
+        ))
+        inserted = [doc for row, doc in batch if row not in failed]
+        for doc in inserted:
+            sync_listing(doc)
+        await add_references(url for doc in inserted for url in doc['images'])
+    
+    report = await run_bulk(
+        stream_records(request.stream(), fmt), build_op, flush,
+        settings.BULK_IMPORT_BATCH_SIZE, settings.BULK_IMPORT_MAX_ROWS
+    )
+    return report.to_dict("inserted")
+
+@router.patch("/listings/bulk")
+async def bulk_update_listings(
+    request: Request,
+    format: Optional[str] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Update many of your listings from a streamed CSV or NDJSON body
+
+    Each row needs the listing `id` plus any ListingUpdate fields to change.
+    Rows for listings you do not own are reported as not found.
+    """
+    fmt = bulk_format(request, format)
     db = get_db()
+    
+    def build_op(record: dict) -> tuple:
+        listing_id = record.get('id')
+        if not isinstance(listing_id, str) or not listing_id:
+            raise ValueError("id: listing id is required")
+        update_data = {k: v for k, v in ListingUpdate(**record).model_dump().items() if v is not None}
+        if not update_data:
+            raise ValueError("No fields to update")
+        if 'images' in update_data:
+            update_data['image_variants'] = image_variants(update_data['images'])
+        return listing_id, update_data
+    
+    async def flush(batch, report):
+        ids = [listing_id for _, (listing_id, _) in batch]
+        owned = await db.listings.find(
+            {"id": {"$in": ids}, "seller_id": current_user.id},
+            {"_id": 0, "id": 1, "images": 1}
+        ).to_list(len(ids))
+        owned_ids = {d['id'] for d in owned}
+        old_images = {d['id']: d.get('images') or [] for d in owned}
+        
+        ops = []
+        for row, (listing_id, update_data) in batch:
+            if listing_id in owned_ids:
+                ops.append((row, UpdateOne(
+                    {"id": listing_id, "seller_id": current_user.id},
+                    {"$set": update_data}
+                )))
+            else:
+                report.fail(row, "Listing not found")
+        
+        if ops:
+            await bulk_write_batch(db.listings, ops, report)
+            added, dropped = [], []
+            async for doc in db.listings.find({"id": {"$in": list(owned_ids)}}, {"_id": 0}):
+                sync_listing(doc)
+                gained, lost = image_changes(old_images[doc['id']], doc.get('images'))
+                added += gained
+                dropped += lost
+            await add_references(added)
+            await release_references(dropped)
+    
+    report = await run_bulk(
+        stream_records(request.stream(), fmt), build_op, flush,
+        settings.BULK_IMPORT_BATCH_SIZE, settings.BULK_IMPORT_MAX_ROWS
+    )
+    return report.to_dict("updated")
+
+def build_listing_filters(
+    category: Optional[str] = None,
+    type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None
+) -> dict:
+    """Mongo filter for the optional listing browse filters"""
     query = {}
     if category:
         query['category'] = category
-    if search:
-        query['$or'] = [
-            {'title': {'$regex': search, '$options': 'i'}},
-            {'description': {'$regex': search, '$options': 'i'}}
+    if type:
+        query['type'] = type
+    if min_price is not None or max_price is not None:
+        query['price'] = {}
+        if min_price is not None:
+            query['price']['$gte'] = min_price
+        if max_price is not None:
+            query['price']['$lte'] = max_price
+    return query
+
+# Relevance order for text search; `id` breaks ties so cursors are stable
+SEARCH_SORT = [("score", -1), ("id", 1)]
+
+# Browse sort orders, served by the compound indexes in database.init_indexes
+LISTING_SORTS = {
+    "newest": [("timestamp", -1), ("id", -1)],
+    "rating": [("rating", -1), ("id", -1)],
+    "price_asc": [("price", 1), ("id", 1)],
+    "price_desc": [("price", -1), ("id", -1)],
+}
+
+def resolve_listing_sort(sort: Optional[str], search: Optional[str]) -> str:
+    """Apply the default sort and reject unknown or unusable ones"""
+    sort = sort or ("relevance" if search else "newest")
+    if sort == "relevance" and not search:
+        raise HTTPException(status_code=400, detail="Relevance sort requires a search query")
+    if sort != "relevance" and sort not in LISTING_SORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort. Use one of: relevance, {', '.join(LISTING_SORTS)}"
+        )
+    return sort
+
+def next_page(items: list, limit: int, order: list) -> tuple:
+    """Trim the look-ahead item; returns (page, next cursor or None)"""
+    if len(items) > limit:
+        items = items[:limit]
+        return items, cursor_for(items[-1], order)
+    return items, None
+
+def cursor_headers(next_cursor: Optional[str]) -> Optional[dict]:
+    """X-Next-Cursor header for list responses, when another page exists"""
+    return {'X-Next-Cursor': next_cursor} if next_cursor else None
+
+def memory_relevance(sort: str) -> bool:
+    """Whether relevance is ranked by the in-process BM25 index right now"""
+    return sort == "relevance" and settings.SEARCH_BACKEND == "memory" and search_index.warm
+
+async def memory_relevance_page(
+    search: str,
+    limit: int,
+    after: Optional[tuple],
+    category: Optional[str],
+    type: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float]
+) -> tuple:
+    """One page ranked by the BM25 index; returns (listing docs, next cursor or None)"""
+    ranked = search_index.search(
+        search, limit + 1, after=after,
+        category=category, type=type, min_price=min_price, max_price=max_price
+    )
+    ranked, next_cursor = next_page([{'score': sc, 'id': i} for sc, i in ranked], limit, SEARCH_SORT)
+    
+    ids = [r['id'] for r in ranked]
+    docs = await get_db().listings.find({"id": {"$in": ids}}, {"_id": 0}).to_list(len(ids))
+    by_id = {d['id']: d for d in docs}
+    return [by_id[i] for i in ids if i in by_id], next_cursor
+
+@router.get("/listings", response_model=List[Listing])
+async def get_listings(
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100)
+):
+    """
+    Get listings with optional filters
+
+    `sort` is one of relevance (default with `search`), newest (default
+    otherwise), rating, price_asc or price_desc. Relevance is ranked by the
+    in-process BM25 index when SEARCH_BACKEND is "memory" and the index is
+    warm, otherwise by the MongoDB text index. Paging is keyset-based: when
+    more results exist, the X-Next-Cursor response header carries the token
+    to pass as `cursor` for the next page, and every page costs the same.
+    """
+    db = get_db()
+    query = build_listing_filters(category, type, min_price, max_price)
+    
+    sort = resolve_listing_sort(sort, search)
+    
+    if memory_relevance(sort):
+        after = None
+        if cursor:
+            values = decode_cursor(cursor)
+            if not isinstance(values.get('score'), (int, float)) or not isinstance(values.get('id'), str):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            after = (values['score'], values['id'])
+        
+        listings, next_cursor = await memory_relevance_page(
+            search, limit, after, category, type, min_price, max_price
+        )
+    elif sort == "relevance":
+        query['$text'] = {'$search': search}
+        pipeline = [
+            {'$match': query},
+            {'$addFields': {'score': {'$meta': 'textScore'}}},
+        ]
+        if cursor:
+            pipeline.append({'$match': keyset_filter(SEARCH_SORT, decode_cursor(cursor))})
+        pipeline += [
+            {'$sort': dict(SEARCH_SORT)},
+            {'$limit': limit + 1},
+            {'$project': {'_id': 0}},
         ]
+        listings = await db.listings.aggregate(pipeline).to_list(limit + 1)
+        listings, next_cursor = next_page(listings, limit, SEARCH_SORT)
+    else:
+        order = LISTING_SORTS[sort]
+        if search:
+            query['$text'] = {'$search': search}
+        if cursor:
+            query.update(keyset_filter(order, decode_cursor(cursor)))
+        
+        listings = await db.listings.find(query, {"_id": 0}).sort(order).limit(limit + 1).to_list(limit + 1)
+        listings, next_cursor = next_page(listings, limit, order)
     
-    listings = await db.listings.find(query, {"_id": 0}).limit(limit).to_list(limit)
+    view_counter.record_impressions(l['id'] for l in listings)
+    return trusted_json_response(listings, Listing, headers=cursor_headers(next_cursor))
+
+@router.get("/listings/suggest")
+async def suggest_listings(q: str = "", limit: int = Query(8, ge=1, le=20)):
+    """
+    Typeahead suggestions for the search box
+
+    Matches titles, tags and categories by prefix (title words match too),
+    ranked by rating and popularity. Served entirely from memory; returns an
+    empty list until the suggest index has finished its first build.
+    """
+    if not suggest_index.warm:
+        return []
+    return suggest_index.suggest(q, limit)
+
+# Upper bounds of the price facet buckets; anything above the last is "1000+"
+PRICE_BUCKETS = [0, 25, 50, 100, 250, 500, 1000]
+
+# Browse facets per normalized filter set
+facet_cache = TTLCache(
+    "listing_facets",
+    maxsize=1000,
+    ttl=settings.FACET_CACHE_TTL_SECONDS
+)
+
+@router.get("/listings/facets")
+async def get_listing_facets(
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort: Optional[str] = None,
+    limit: int = Query(24, ge=1, le=100)
+):
+    """
+    Browse page in one round trip: category, type and price-bucket counts
+    plus the first page of results, computed with a single $facet aggregation
+
+    Counts cover the listings matching all active filters (by the MongoDB
+    text index when searching). Continue paging through /listings with the
+    returned next_cursor, filters and sort: when /listings ranks relevance
+    with the in-process BM25 index, so does the first page here, since its
+    cursors carry BM25 scores that a textScore page cannot continue from.
+    Prices that are missing, negative or not numbers are left out of the
+    price buckets.
+    """
+    sort = resolve_listing_sort(sort, search)
+    search = " ".join(search.lower().split()) if search else None
+    cache_key = (category, search, type, min_price, max_price, sort, limit)
+    
+    payload = facet_cache.get(cache_key)
+    if payload is not None:
+        return Response(content=payload, media_type="application/json")
     
-    for p in listings:
-        if isinstance(p.get('timestamp'), str):
-            p['created_at'] = datetime.fromisoformat(p.pop('timestamp'))
+    query = build_listing_filters(category, type, min_price, max_price)
+    if search:
+        query['$text'] = {'$search': search}
+        pipeline = [{'$match': query}, {'$addFields': {'score': {'$meta': 'textScore'}}}]
+    else:
+        pipeline = [{'$match': query}]
     
-    return [Listing(**p) for p in listings]
+    order = SEARCH_SORT if sort == "relevance" else LISTING_SORTS[sort]
+    ranked_in_memory = memory_relevance(sort)
+    facet_stages = {
+        'total': [{'$count': 'count'}],
+        'category': [{'$group': {'_id': '$category', 'count': {'$sum': 1}}}, {'$sort': {'count': -1}}],
+        'type': [{'$group': {'_id': '$type', 'count': {'$sum': 1}}}, {'$sort': {'count': -1}}],
+        'price': [
+            # Otherwise the default bucket would also collect null, negative and non-numeric prices
+            {'$match': {'price': {'$type': 'number', '$gte': 0}}},
+            {'$bucket': {
+                'groupBy': '$price',
+                'boundaries': PRICE_BUCKETS,
+                'default': '1000+',
+                'output': {'count': {'$sum': 1}}
+            }},
+        ],
+    }
+    if not ranked_in_memory:
+        facet_stages['results'] = [{'$sort': dict(order)}, {'$limit': limit + 1}, {'$project': {'_id': 0}}]
+    pipeline.append({'$facet': facet_stages})
+    
+    db = get_db()
+    facets = (await db.listings.aggregate(pipeline).to_list(1))[0]
+    
+    if ranked_in_memory:
+        results, next_cursor = await memory_relevance_page(
+            search, limit, None, category, type, min_price, max_price
+        )
+    else:
+        results, next_cursor = next_page(facets['results'], limit, order)
+    
+    price_facets = []
+    for bucket in facets['price']:
+        if bucket['_id'] == '1000+':
+            price_facets.append({'min': PRICE_BUCKETS[-1], 'max': None, 'count': bucket['count']})
+        else:
+            upper = PRICE_BUCKETS[PRICE_BUCKETS.index(bucket['_id']) + 1]
+            price_facets.append({'min': bucket['_id'], 'max': upper, 'count': bucket['count']})
+    
+    body = {
+        # Skip legacy documents missing required fields, as trusted_json_response does
+        'results': [item for item in (trusted_dump(p, Listing) for p in results) if item is not None],
+        'next_cursor': next_cursor,
+        'total': facets['total'][0]['count'] if facets['total'] else 0,
+        'facets': {
+            'category': [{'value': f['_id'], 'count': f['count']} for f in facets['category']],
+            'type': [{'value': f['_id'], 'count': f['count']} for f in facets['type']],
+            'price': price_facets,
+        },
+    }
+    payload = dumps(body)
+    facet_cache.set(cache_key, payload)
+    return Response(content=payload, media_type="application/json")
 
 @router.get("/listings/{listing_id}", response_model=Listing)
 async def get_listing(listing_id: str):
-    """Get a single listing by ID"""
-    db = get_db()
-    listing = await db.listings.find_one({"id": listing_id}, {"_id": 0})
-    if not listing:
-        raise HTTPException(status_code=404, detail="Listing not found")
-    
-    if isinstance(listing.get('timestamp'), str):
-        listing['created_at'] = datetime.fromisoformat(listing.pop('timestamp'))
+    """Get a single listing by ID (served from the listing cache when warm)"""
+    payload = listing_cache.get(listing_id)
+    if payload is None:
+        db = get_db()
+        listing = await db.listings.find_one({"id": listing_id}, {"_id": 0})
+        if not listing:
+            raise HTTPException(status_code=404, detail="Listing not found")
+        
+        if isinstance(listing.get('timestamp'), str):
+            listing['created_at'] = datetime.fromisoformat(listing.pop('timestamp'))
+        
+        payload = Listing(**listing).model_dump_json().encode()
+        listing_cache.set(listing_id, payload)
     
-    return Listing(**listing)
+    # Buffered; flushed to MongoDB in bulk by the view counter task
+    view_counter.record_view(listing_id)
+    return Response(content=payload, media_type="application/json")
 
 @router.put("/listings/{listing_id}", response_model=Listing)
 async def update_listing(listing_id: str, listing_data: ListingUpdate, current_user: User = Depends(get_current_user)):
@@ -141,9 +552,15 @@ async def update_listing(listing_id: str, listing_data: ListingUpdate, current_u
         raise HTTPException(status_code=403, detail="Not authorized")
     
     update_data = {k: v for k, v in listing_data.model_dump().items() if v is not None}
+    if 'images' in update_data:
+        update_data['image_variants'] = image_variants(update_data['images'])
     await db.listings.update_one({"id": listing_id}, {"$set": update_data})
     
     updated = await db.listings.find_one({"id": listing_id}, {"_id": 0})
+    sync_listing(updated)
+    added, dropped = image_changes(listing.get('images'), updated.get('images'))
+    await add_references(added)
+    await release_references(dropped)
     if isinstance(updated.get('timestamp'), str):
         updated['created_at'] = datetime.fromisoformat(updated.pop('timestamp'))
     
@@ -160,11 +577,39 @@ async def delete_listing(listing_id: str, current_user: User = Depends(get_curre
     if listing['seller_id'] != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    await db.listings.delete_one({"id": listing_id})
+    result = await db.listings.delete_one({"id": listing_id})
+    drop_listing(listing_id)
+    if result.deleted_count:
+        await release_references(listing.get('images') or [])
     return {"message": "Listing deleted"}
 
 # ============ REVIEW ROUTES ============
 
+def rating_aggregate_update(rating: int) -> list:
+    """
+    Pipeline update adding one rating to a listing's aggregates
+
+    rating_sum, reviews_count and the star's rating_histogram bucket grow
+    atomically in one server-side update and the displayed `rating` is
+    re-derived from them. Listings written
+    before rating_sum existed start from rating * reviews_count until
+    scripts/backfill_review_aggregates.py has run.
+    """
+    star = str(rating)
+    return [
+        {"$set": {
+            "rating_sum": {"$add": [
+                {"$ifNull": ["$rating_sum", {"$multiply": [
+                    {"$ifNull": ["$rating", 0]}, {"$ifNull": ["$reviews_count", 0]}
+                ]}]},
+                rating
+            ]},
+            "reviews_count": {"$add": [{"$ifNull": ["$reviews_count", 0]}, 1]},
+            f"rating_histogram.{star}": {"$add": [{"$ifNull": [f"$rating_histogram.{star}", 0]}, 1]},
+        }},
+        {"$set": {"rating": {"$round": [{"$divide": ["$rating_sum", "$reviews_count"]}, 1]}}},
+    ]
+
 @router.post("/reviews", response_model=Review)
 async def create_review(review_data: ReviewCreate, current_user: User = Depends(get_current_user)):
     """Create a review for a listing"""
@@ -184,41 +629,80 @@ async def create_review(review_data: ReviewCreate, current_user: User = Depends(
     
     await db.reviews.insert_one(review_dict)
     
-    # Update listing rating
-    reviews = await db.reviews.find({"listing_id": review_data.listing_id}, {"_id": 0}).to_list(1000)
-    avg_rating = sum(r['rating'] for r in reviews) / len(reviews)
+    # Update listing rating from its running aggregates (O(1) per review)
     await db.listings.update_one(
         {"id": review_data.listing_id},
-        {"$set": {"rating": round(avg_rating, 1), "reviews_count": len(reviews)}}
+        rating_aggregate_update(review.rating)
     )
+    invalidate_listing(review_data.listing_id)
     
     return review
 
+REVIEW_SORTS = {
+    "newest": [("timestamp", -1), ("id", -1)],
+    "rating_desc": [("rating", -1), ("timestamp", -1), ("id", -1)],
+    "rating_asc": [("rating", 1), ("timestamp", -1), ("id", -1)],
+}
+
 @router.get("/reviews/{listing_id}", response_model=List[Review])
-async def get_reviews(listing_id: str):
-    """Get all reviews for a listing"""
+async def get_reviews(
+    listing_id: str,
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Get reviews for a listing, a page at a time
+
+    `sort` is newest (default), rating_desc or rating_asc. Pass the
+    X-Next-Cursor response header back as `cursor` for the next page.
+    """
+    order = REVIEW_SORTS.get(sort)
+    if order is None:
+        raise HTTPException(status_code=400, detail=f"Invalid sort. Use one of: {', '.join(REVIEW_SORTS)}")
+    
     db = get_db()
-    reviews = await db.reviews.find({"listing_id": listing_id}, {"_id": 0}).to_list(1000)
+    query = {"listing_id": listing_id}
+    if cursor:
+        query.update(keyset_filter(order, decode_cursor(cursor)))
     
-    for r in reviews:
-        if isinstance(r.get('timestamp'), str):
-            r['created_at'] = datetime.fromisoformat(r.pop('timestamp'))
+    reviews = await db.reviews.find(query, {"_id": 0}).sort(order).limit(limit + 1).to_list(limit + 1)
+    reviews, next_cursor = next_page(reviews, limit, order)
+    return trusted_json_response(reviews, Review, headers=cursor_headers(next_cursor))
+
+@router.get("/reviews/{listing_id}/summary", response_model=ReviewSummary)
+async def get_review_summary(listing_id: str):
+    """Average rating, review count and 1-5 star histogram, read from the listing"""
+    db = get_db()
+    listing = await db.listings.find_one(
+        {"id": listing_id},
+        {"_id": 0, "rating": 1, "reviews_count": 1, "rating_histogram": 1}
+    )
+    if not listing:
+        raise HTTPException(status_code=404, detail="Listing not found")
     
-    return [Review(**r) for r in reviews]
+    histogram = listing.get('rating_histogram') or {}
+    return ReviewSummary(
+        listing_id=listing_id,
+        rating=listing.get('rating', 0.0),
+        reviews_count=listing.get('reviews_count', 0),
+        histogram={str(star): histogram.get(str(star), 0) for star in range(1, 6)}
+    )
 
 # ============ ORDER ROUTES - FIXED ============
 
 @router.post("/orders", response_model=Order)
-async def create_order(listing_id: str, quantity: int, current_user: User = Depends(get_current_user)):
-    """Create a new order"""
+async def create_order(listing_id: str, quantity: int = Query(..., ge=1), current_user: User = Depends(get_current_user)):
+    """Create a new order, reserving product stock atomically"""
     db = get_db()
-    listing = await db.listings.find_one({"id": listing_id}, {"_id": 0})
+    listing = await db.listings.find_one(
+        {"id": listing_id},
+        {"_id": 0, "seller_id": 1, "title": 1, "price": 1, "type": 1}
+    )
     if not listing:
         raise HTTPException(status_code=404, detail="Listing not found")
     
-    if listing.get('type') == "product" and listing.get('stock', 0) < quantity:
-        raise HTTPException(status_code=400, detail="Insufficient stock")
-    
+    tracked = listing.get('type') == "product"
     order = Order(
         buyer_id=current_user.id,
         buyer_name=current_user.name,
@@ -226,42 +710,100 @@ async def create_order(listing_id: str, quantity: int, current_user: User = Depe
         listing_id=listing_id,  # ✅ FIX: Include listing_id
         listing_title=listing['title'],  # ✅ FIX: Include listing_title
         quantity=quantity,
-        total_amount=listing['price'] * quantity
+        total_amount=listing['price'] * quantity,
+        stock_state=inventory_service.RESERVED if tracked else inventory_service.UNTRACKED
     )
     
+    if tracked and not await inventory_service.reserve_stock(listing_id, quantity, order.id, current_user.id):
+        raise HTTPException(status_code=400, detail="Insufficient stock")
+    
     order_dict = order.model_dump()
     order_dict['timestamp'] = order_dict.pop('created_at').isoformat()
     
     await db.orders.insert_one(order_dict)
     return order
 
+# Fallbacks for orders created before listing_id/listing_title were stored
+ORDER_DEFAULTS = {"listing_id": "unknown", "listing_title": "Product"}
+
+ORDER_SORT = [("timestamp", -1), ("id", -1)]
+
+def order_owner_query(user: User) -> dict:
+    """Buyers see the orders they placed, sellers the orders they received"""
+    return {"buyer_id": user.id} if user.role == "buyer" else {"seller_id": user.id}
+
 @router.get("/orders")
-async def get_orders(current_user: User = Depends(get_current_user)):
-    """Get user's orders - FIXED to handle missing fields"""
+async def get_orders(
+    status: Optional[str] = None,
+    payment_status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get user's orders, newest first, a page at a time
+
+    Filter with `status` and/or `payment_status`. Pass the X-Next-Cursor
+    response header back as `cursor` for the next page.
+    """
     db = get_db()
-    query = {"buyer_id": current_user.id} if current_user.role == "buyer" else {"seller_id": current_user.id}
-    orders = await db.orders.find(query, {"_id": 0}).to_list(1000)
-    
-    # ✅ FIX: Handle missing fields gracefully
-    result = []
-    for o in orders:
-        # Convert timestamp
-        if isinstance(o.get('timestamp'), str):
-            o['created_at'] = datetime.fromisoformat(o.pop('timestamp'))
-        
-        # ✅ FIX: Provide defaults for missing fields
-        if 'listing_id' not in o:
-            o['listing_id'] = 'unknown'
-        if 'listing_title' not in o:
-            o['listing_title'] = 'Product'
-        
-        try:
-            result.append(Order(**o))
-        except Exception as e:
-            print(f"⚠️ Skipping invalid order: {e}")
-            continue
+    query = order_owner_query(current_user)
+    if status:
+        query["status"] = status
+    if payment_status:
+        query["payment_status"] = payment_status
+    if cursor:
+        query.update(keyset_filter(ORDER_SORT, decode_cursor(cursor)))
+    
+    orders = await db.orders.find(query, {"_id": 0}).sort(ORDER_SORT).limit(limit + 1).to_list(limit + 1)
+    orders, next_cursor = next_page(orders, limit, ORDER_SORT)
     
-    return result
+    # ✅ FIX: Provide defaults for missing fields; orders missing other required fields are skipped
+    return trusted_json_response(orders, Order, defaults=ORDER_DEFAULTS, headers=cursor_headers(next_cursor))
+
+@router.get("/orders/summary", response_model=OrderSummary)
+async def get_order_summary(current_user: User = Depends(get_current_user)):
+    """Order counts and amounts by status and payment status, in one aggregation"""
+    db = get_db()
+    group = lambda key: [
+        {"$group": {"_id": key, "count": {"$sum": 1}, "amount": {"$sum": "$total_amount"}}}
+    ]
+    result = await db.orders.aggregate([
+        {"$match": order_owner_query(current_user)},
+        {"$facet": {
+            "by_status": group("$status"),
+            "by_payment_status": group("$payment_status"),
+        }},
+    ]).to_list(1)
+    facets = result[0] if result else {}
+    
+    buckets = {
+        field: {
+            str(b["_id"]): OrderStatusSummary(count=b["count"], amount=round(b["amount"] or 0, 2))
+            for b in facets.get(field, [])
+        }
+        for field in ("by_status", "by_payment_status")
+    }
+    paid = buckets["by_payment_status"].get("paid")
+    return OrderSummary(
+        total_orders=sum(b.count for b in buckets["by_status"].values()),
+        total_amount=round(sum(b.amount for b in buckets["by_status"].values()), 2),
+        paid_amount=paid.amount if paid else 0.0,
+        **buckets
+    )
+
+@router.get("/orders/{order_id}", response_model=Order)
+async def get_order(order_id: str, current_user: User = Depends(get_current_user)):
+    """Get one of the user's orders"""
+    db = get_db()
+    order = await db.orders.find_one({"id": order_id}, {"_id": 0})
+    if not order or current_user.id not in (order.get("buyer_id"), order.get("seller_id")):
+        raise HTTPException(status_code=404, detail="Order not found")
+    item = trusted_dump(order, Order, ORDER_DEFAULTS)
+    if item is None:
+        # A legacy document missing required fields cannot be shown as an Order
+        raise HTTPException(status_code=404, detail="Order not found")
+    return Response(content=dumps(item), media_type="application/json")
 
 # ============ USER & MESSAGE ROUTES ============
 
@@ -269,16 +811,11 @@ async def get_orders(current_user: User = Depends(get_current_user)):
 async def get_users(current_user: User = Depends(get_current_user)):
     """Get all users (for chat)"""
     db = get_db()
-    users = await db.users.find({}, {"_id": 0, "password": 0}).to_list(1000)
-    
-    result = []
-    for u in users:
-        if u["id"] != current_user.id:
-            if isinstance(u.get('timestamp'), str):
-                u['created_at'] = datetime.fromisoformat(u.pop('timestamp'))
-            result.append(User(**u))
-    
-    return result
+    users = await db.users.find(
+        {"id": {"$ne": current_user.id}},
+        {"_id": 0, "password": 0}
+    ).to_list(1000)
+    return trusted_json_response(users, User)
 
 @router.get("/messages/{other_user_id}", response_model=List[Message])
 async def get_messages(other_user_id: str, current_user: User = Depends(get_current_user)):
@@ -290,7 +827,7 @@ async def get_messages(other_user_id: str, current_user: User = Depends(get_curr
             {"sender_id": other_user_id, "receiver_id": current_user.id}
         ]},
         {"_id": 0}
-    ).to_list(10000)
+    ).sort("timestamp", 1).to_list(10000)
     
     # Mark as read
     await db.messages.update_many(
@@ -298,37 +835,21 @@ async def get_messages(other_user_id: str, current_user: User = Depends(get_curr
         {"$set": {"read": True}}
     )
     
-    for m in messages:
-        if isinstance(m.get('timestamp'), str):
-            m['created_at'] = datetime.fromisoformat(m.pop('timestamp'))
-    
-    return sorted([Message(**m) for m in messages], key=lambda x: x.created_at)
+    return trusted_json_response(messages, Message)
 
 # ============ FILE UPLOAD ============
 
 @router.post("/upload")
 async def upload_file(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
-    """Upload a file"""
+    """Upload a file (stored once per content hash)"""
     try:
-        # Check file size
-        file.file.seek(0, 2)
-        file_size = file.file.tell()
-        file.file.seek(0)
-        
-        if file_size > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(status_code=400, detail="File size must be less than 10MB")
-        
-        # Generate unique filename
-        file_extension = file.filename.split(".")[-1] if "." in file.filename else ""
-        unique_filename = f"{uuid.uuid4()}.{file_extension}"
-        file_path = settings.UPLOAD_DIR / unique_filename
-        
-        # Save file
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        file_url = f"http://localhost:8000/uploads/{unique_filename}"
-        return {"file_url": file_url, "file_name": file.filename}
+        stored = await store_upload(file)
+        return {
+            "file_url": upload_url(stored["filename"]),
+            "file_name": file.filename,
+            "sha256": stored["sha256"],
+            "size": stored["size"],
+        }
     
     except HTTPException:
         raise
@@ -367,12 +888,7 @@ async def get_wishlist(current_user: User = Depends(get_current_user)):
     listing_ids = [item['listing_id'] for item in wishlist_items]
     
     listings = await db.listings.find({"id": {"$in": listing_ids}}, {"_id": 0}).to_list(1000)
-    
-    for p in listings:
-        if isinstance(p.get('timestamp'), str):
-            p['created_at'] = datetime.fromisoformat(p.pop('timestamp'))
-    
-    return [Listing(**p) for p in listings]
+    return trusted_json_response(listings, Listing)
 
 # ============ PAYMENT ROUTES (STRIPE) ============
 
@@ -387,6 +903,19 @@ async def create_checkout_session(order_id: str, request: Request, current_user:
     if order['buyer_id'] != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
     
+    if order.get('payment_status') == "paid":
+        raise HTTPException(status_code=400, detail="Order is already paid")
+    
+    # Cancelled (e.g. a failed cart checkout) or otherwise settled orders
+    # must not take their stock again
+    if order.get('status', "pending") != "pending":
+        raise HTTPException(status_code=400, detail=f"Order is {order['status']}")
+    
+    # Keep the stock held for as long as the session can be paid, plus a grace period
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.CHECKOUT_SESSION_TTL_SECONDS)
+    if not await inventory_service.hold_for_checkout(order, expires_at + timedelta(minutes=5)):
+        raise HTTPException(status_code=400, detail="Reservation expired and the item is out of stock")
+    
     host_url = str(request.base_url)
     success_url = f"{host_url}payment-success?session_id={{CHECKOUT_SESSION_ID}}"
     cancel_url = f"{host_url}payment-cancel"
@@ -395,20 +924,27 @@ async def create_checkout_session(order_id: str, request: Request, current_user:
         # ✅ FIX: Handle missing listing_title
         listing_title = order.get('listing_title', 'Product')
         
-        checkout_session = stripe.checkout.Session.create(
-            line_items=[{
-                'price_data': {
-                    'currency': 'usd',
-                    'product_data': {'name': listing_title},
-                    'unit_amount': int(order['total_amount'] * 100),
-                },
-                'quantity': order['quantity'],
-            }],
-            mode='payment',
-            success_url=success_url,
-            cancel_url=cancel_url,
-            metadata={"order_id": order_id, "buyer_id": current_user.id}
-        )
+        try:
+            checkout_session = await payments.create_checkout_session({
+                'line_items': [{
+                    'price_data': {
+                        'currency': 'usd',
+                        'product_data': {'name': listing_title},
+                        'unit_amount': int(order['total_amount'] * 100),
+                    },
+                    'quantity': order['quantity'],
+                }],
+                'mode': 'payment',
+                'expires_at': int(expires_at.timestamp()),
+                'success_url': success_url,
+                'cancel_url': cancel_url,
+                'metadata': {"order_id": order_id, "buyer_id": current_user.id}
+            })
+        except Exception:
+            # Nothing can pay this session: give the stock back instead of
+            # leaving it held until the extended expiry
+            await inventory_service.release_orders([order_id])
+            raise
 
         transaction = PaymentTransaction(
             session_id=checkout_session.id,
@@ -427,69 +963,175 @@ async def create_checkout_session(order_id: str, request: Request, current_user:
         await db.orders.update_one({"id": order_id}, {"$set": {"session_id": checkout_session.id}})
         
         return CheckoutSessionResponse(session_id=checkout_session.id, url=checkout_session.url)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/checkout/cart", response_model=CartCheckoutResponse)
+async def checkout_cart(cart: CartCheckout, request: Request, current_user: User = Depends(get_current_user)):
+    """
+    Check out a whole cart: one order per listing, paid by one Stripe session
+
+    Listings are loaded with one `$in` query, product stock is reserved with
+    concurrent guarded updates (one per item) and the orders are inserted
+    with one insert_many. If the Stripe session cannot be created, the holds
+    are released and the orders cancelled at once.
+    """
+    db = get_db()
+    quantities = {}
+    for item in cart.items:
+        quantities[item.listing_id] = quantities.get(item.listing_id, 0) + item.quantity
+    
+    listings = await db.listings.find(
+        {"id": {"$in": list(quantities)}},
+        {"_id": 0, "id": 1, "seller_id": 1, "title": 1, "price": 1, "type": 1}
+    ).to_list(len(quantities))
+    by_id = {listing['id']: listing for listing in listings}
+    missing = [lid for lid in quantities if lid not in by_id]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Listings not found: {', '.join(missing)}")
+    
+    orders = []
+    for listing_id, quantity in quantities.items():
+        listing = by_id[listing_id]
+        orders.append(Order(
+            buyer_id=current_user.id,
+            buyer_name=current_user.name,
+            seller_id=listing['seller_id'],
+            listing_id=listing_id,
+            listing_title=listing['title'],
+            quantity=quantity,
+            total_amount=listing['price'] * quantity,
+            shipping_address=cart.shipping_address,
+            stock_state=inventory_service.RESERVED if listing.get('type') == "product" else inventory_service.UNTRACKED
+        ))
+    
+    short = await inventory_service.reserve_cart(
+        [
+            {"order_id": o.id, "listing_id": o.listing_id, "quantity": o.quantity}
+            for o in orders if o.stock_state == inventory_service.RESERVED
+        ],
+        current_user.id
+    )
+    if short is not None:
+        raise HTTPException(status_code=400, detail=f"Insufficient stock for {by_id[short]['title']}")
+    
+    order_docs = []
+    for order in orders:
+        order_dict = order.model_dump()
+        order_dict['timestamp'] = order_dict.pop('created_at').isoformat()
+        order_docs.append(order_dict)
+    await db.orders.insert_many(order_docs)
+    order_ids = [o.id for o in orders]
+    
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.CHECKOUT_SESSION_TTL_SECONDS)
+    host_url = str(request.base_url)
+    try:
+        checkout_session = await payments.create_checkout_session({
+            'line_items': [{
+                'price_data': {
+                    'currency': 'usd',
+                    'product_data': {'name': order.listing_title},
+                    'unit_amount': int(round(by_id[order.listing_id]['price'] * 100)),
+                },
+                'quantity': order.quantity,
+            } for order in orders],
+            'mode': 'payment',
+            'expires_at': int(expires_at.timestamp()),
+            'success_url': f"{host_url}payment-success?session_id={{CHECKOUT_SESSION_ID}}",
+            'cancel_url': f"{host_url}payment-cancel",
+            # Stripe caps metadata values at 500 characters; the transaction keeps the full list
+            'metadata': {"order_id": order_ids[0], "order_count": len(order_ids), "buyer_id": current_user.id}
+        })
+    except Exception as e:
+        # Nothing can pay these orders: hand their stock back now
+        await inventory_service.release_orders(order_ids)
+        await db.orders.update_many({"id": {"$in": order_ids}}, {"$set": {"status": "cancelled"}})
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=502, detail=f"Payment provider error: {e}")
+    
+    await inventory_service.extend_holds(order_ids, expires_at + timedelta(minutes=5))
+    
+    transaction = PaymentTransaction(
+        session_id=checkout_session.id,
+        order_id=order_ids[0],
+        order_ids=order_ids,
+        buyer_id=current_user.id,
+        amount=round(sum(o.total_amount for o in orders), 2),
+        currency="usd",
+        payment_status="pending",
+        metadata={"order_ids": order_ids}
+    )
+    transaction_dict = transaction.model_dump()
+    transaction_dict['timestamp'] = transaction_dict.pop('created_at').isoformat()
+    
+    await db.payment_transactions.insert_one(transaction_dict)
+    await db.orders.update_many({"id": {"$in": order_ids}}, {"$set": {"session_id": checkout_session.id}})
+    
+    return CartCheckoutResponse(session_id=checkout_session.id, url=checkout_session.url, order_ids=order_ids)
+
 @router.get("/checkout/status/{session_id}", response_model=CheckoutStatusResponse)
 async def get_checkout_status(session_id: str, current_user: User = Depends(get_current_user)):
-    """Get checkout session status"""
+    """
+    Get checkout session status
+
+    Answered from the local transaction, which the webhook consumer keeps
+    current. A paid event still waiting in the queue is applied on the spot.
+    Only unpaid sessions fall back to Stripe, through the cached, coalesced
+    status lookup.
+    """
+    db = get_db()
+    transaction = await db.payment_transactions.find_one(
+        {"session_id": session_id}, {"_id": 0, "buyer_id": 1, "payment_status": 1}
+    )
+    if not transaction:
+        raise HTTPException(status_code=404, detail="Checkout session not found")
+    if transaction['buyer_id'] != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    
+    if transaction['payment_status'] == "paid":
+        return CheckoutStatusResponse(payment_status="paid", status="complete")
+    
+    queued = await db.stripe_events.find_one(
+        {"session_id": session_id, "payment_status": "paid", "status": {"$in": ["pending", "processing"]}},
+        {"_id": 0, "event_id": 1}
+    )
+    if queued:
+        await apply_paid_sessions([session_id])
+        return CheckoutStatusResponse(payment_status="paid", status="complete")
+    
     try:
-        session = stripe.checkout.Session.retrieve(session_id)
-        payment_status = session.payment_status
-
-        if payment_status == "paid":
-            db = get_db()
-            transaction = await db.payment_transactions.find_one({"session_id": session_id}, {"_id": 0})
-            if transaction and transaction['payment_status'] != "paid":
-                await db.payment_transactions.update_one(
-                    {"session_id": session_id},
-                    {"$set": {"payment_status": "paid"}}
-                )
-                await db.orders.update_one(
-                    {"id": transaction['order_id']},
-                    {"$set": {"payment_status": "paid", "status": "confirmed"}}
-                )
-                
-                order = await db.orders.find_one({"id": transaction['order_id']}, {"_id": 0})
-                if order and 'listing_id' in order:
-                    await db.listings.update_one(
-                        {"id": order['listing_id']},
-                        {"$inc": {"stock": -order['quantity']}}
-                    )
-        
-        return CheckoutStatusResponse(payment_status=payment_status)
+        session = await payments.session_status(session_id)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=502, detail=f"Payment provider lookup failed: {e}")
+    
+    if session['payment_status'] == "paid":
+        # Idempotent: the webhook consumer may have applied it already
+        await apply_paid_sessions([session_id])
+    
+    return CheckoutStatusResponse(**session)
 
 @router.post("/webhook/stripe")
 async def stripe_webhook(request: Request):
-    """Stripe webhook handler"""
-    db = get_db()
+    """
+    Stripe webhook handler
+
+    Verifies and persists the event, then acknowledges; the Stripe event
+    consumer applies it in the background. Duplicate deliveries are ignored.
+    """
     payload = await request.body()
     sig_header = request.headers.get('stripe-signature')
 
     try:
-        event = stripe.Webhook.construct_event(
-            payload=payload, sig_header=sig_header, secret=settings.STRIPE_WEBHOOK_SECRET
-        )
+        event = payments.construct_event(payload, sig_header, settings.STRIPE_WEBHOOK_SECRET)
     except:
         raise HTTPException(status_code=400, detail="Invalid signature")
 
-    if event['type'] == 'checkout.session.completed':
-        session = event['data']['object']
-        session_id = session['id']
-        payment_status = session['payment_status']
-
-        if payment_status == "paid":
-            transaction = await db.payment_transactions.find_one({"session_id": session_id}, {"_id": 0})
-            if transaction and transaction['payment_status'] != "paid":
-                await db.payment_transactions.update_one(
-                    {"session_id": session_id},
-                    {"$set": {"payment_status": "paid"}}
-                )
-                await db.orders.update_one(
-                    {"id": transaction['order_id']},
-                    {"$set": {"payment_status": "paid", "status": "confirmed"}}
-                )
+    # A failed insert surfaces as a 500, so Stripe retries the delivery
+    await ingest_event(event)
 
     return {"status": "success"}
\ No newline at end of file
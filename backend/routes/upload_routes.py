@@ -0,0 +1,84 @@
+# backend/routes/upload_routes.py
+"""
+Chunked Upload Routes for NovoMarket
+Resumable uploads for large portfolio and chat attachments
+
+Protocol:
+    POST   /uploads/chunked                        -> start, returns upload_id, part_size, total_parts
+    PUT    /uploads/chunked/{upload_id}/parts/{n}  -> raw part bytes (parts are 1-based)
+    GET    /uploads/chunked/{upload_id}            -> received / missing parts, to resume
+    POST   /uploads/chunked/{upload_id}/complete   -> assemble, returns file_url
+    DELETE /uploads/chunked/{upload_id}            -> abort
+"""
+
+from fastapi import APIRouter, Depends, Request
+from pydantic import BaseModel
+from typing import Optional
+
+from utils.auth_utils import get_current_user
+from models import User
+from services.chunked_uploads import (
+    init_upload,
+    get_upload,
+    write_part,
+    complete_upload,
+    abort_upload,
+    status_view
+)
+from services.upload_storage import upload_url
+
+router = APIRouter(prefix="/uploads/chunked", tags=["Uploads"])
+
+
+class ChunkedUploadInit(BaseModel):
+    filename: str
+    size: int
+    content_type: Optional[str] = None
+
+
+@router.post("")
+async def start_chunked_upload(data: ChunkedUploadInit, current_user: User = Depends(get_current_user)):
+    """Start a resumable upload"""
+    upload = await init_upload(current_user.id, data.filename, data.size, data.content_type)
+    return status_view(upload)
+
+
+@router.get("/{upload_id}")
+async def get_chunked_upload(upload_id: str, current_user: User = Depends(get_current_user)):
+    """Upload progress; re-send the missing parts to resume"""
+    upload = await get_upload(upload_id, current_user.id)
+    return status_view(upload)
+
+
+@router.put("/{upload_id}/parts/{part_number}")
+async def upload_part(
+    upload_id: str,
+    part_number: int,
+    request: Request,
+    current_user: User = Depends(get_current_user)
+):
+    """Upload one part as the raw request body"""
+    upload = await get_upload(upload_id, current_user.id)
+    size = await write_part(upload, part_number, request.stream())
+    return {"part_number": part_number, "size": size}
+
+
+@router.post("/{upload_id}/complete")
+async def complete_chunked_upload(upload_id: str, current_user: User = Depends(get_current_user)):
+    """Assemble all parts into the final file"""
+    upload = await get_upload(upload_id, current_user.id)
+    stored = await complete_upload(upload)
+    return {
+        "file_url": upload_url(stored["filename"]),
+        "file_name": upload["filename"],
+        "sha256": stored["sha256"],
+        "size": stored["size"],
+    }
+
+
+@router.delete("/{upload_id}")
+async def abort_chunked_upload(upload_id: str, current_user: User = Depends(get_current_user)):
+    """Abort an upload and discard its parts"""
+    upload = await get_upload(upload_id, current_user.id)
+    await abort_upload(upload)
+    return {"message": "Upload aborted"}
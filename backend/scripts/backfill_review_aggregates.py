@@ -0,0 +1,116 @@
+# backend/scripts/backfill_review_aggregates.py
+"""
+One-off backfill of listing rating aggregates
+
+Recomputes rating_sum, reviews_count, rating and rating_histogram for every
+listing from the reviews collection in one aggregation, then writes them with batched
+bulk_writes. Listings without reviews are reset to zero; they are found by
+streaming listings and probing reviews with a correlated $lookup (needs
+MongoDB 5.0+ to use the reviews listing_id index). Safe to re-run;
+run it once after deploying incremental rating aggregates, while review
+traffic is low (reviews created mid-run may be counted against a stale sum).
+
+Usage (from backend/):
+    python -m scripts.backfill_review_aggregates [--batch-size 1000] [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pymongo import UpdateOne  # noqa: E402
+
+from database import database, get_db  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+logger = logging.getLogger("backfill_review_aggregates")
+
+
+async def backfill(batch_size: int, dry_run: bool) -> dict:
+    db = get_db()
+    ops = []
+    written = 0
+    seen = 0
+
+    async def flush():
+        nonlocal ops, written
+        if ops and not dry_run:
+            result = await db.listings.bulk_write(ops, ordered=False)
+            written += result.modified_count
+        ops = []
+
+    totals = db.reviews.aggregate([
+        {"$group": {"_id": {"listing_id": "$listing_id", "star": "$rating"}, "count": {"$sum": 1}}},
+        {"$group": {
+            "_id": "$_id.listing_id",
+            "rating_sum": {"$sum": {"$multiply": ["$_id.star", "$count"]}},
+            "reviews_count": {"$sum": "$count"},
+            "stars": {"$push": {"star": "$_id.star", "count": "$count"}},
+        }},
+    ], allowDiskUse=True)
+    async for row in totals:
+        seen += 1
+        ops.append(UpdateOne(
+            {"id": row["_id"]},
+            {"$set": {
+                "rating_sum": row["rating_sum"],
+                "reviews_count": row["reviews_count"],
+                "rating": round(row["rating_sum"] / row["reviews_count"], 1),
+                "rating_histogram": {str(s["star"]): s["count"] for s in row["stars"]},
+            }}
+        ))
+        if len(ops) >= batch_size:
+            await flush()
+    await flush()
+
+    # Listings whose reviews are all gone (or never existed), found by
+    # streaming the ones with non-zero aggregates and probing reviews, so no
+    # id list has to be held in memory or sent back to the server
+    stale = db.listings.aggregate([
+        {"$match": {"$or": [
+            {"rating_sum": {"$ne": 0}}, {"reviews_count": {"$ne": 0}}, {"rating": {"$ne": 0}},
+            {"rating_histogram": {"$ne": {}}}
+        ]}},
+        {"$project": {"_id": 0, "id": 1}},
+        {"$lookup": {
+            "from": "reviews",
+            "localField": "id",
+            "foreignField": "listing_id",
+            "pipeline": [{"$limit": 1}, {"$project": {"_id": 1}}],
+            "as": "review",
+        }},
+        {"$match": {"review": []}},
+    ], allowDiskUse=True)
+    reset = 0
+    async for row in stale:
+        reset += 1
+        ops.append(UpdateOne(
+            {"id": row["id"]},
+            {"$set": {"rating_sum": 0, "reviews_count": 0, "rating": 0.0, "rating_histogram": {}}}
+        ))
+        if len(ops) >= batch_size:
+            await flush()
+    await flush()
+
+    return {"reviewed_listings": seen, "reset_listings": reset, "modified": written}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--dry-run", action="store_true", help="compute without writing")
+    args = parser.parse_args()
+
+    database.connect()
+    try:
+        summary = asyncio.run(backfill(args.batch_size, args.dry_run))
+    finally:
+        database.close()
+    logger.info(f"✅ Review aggregates backfilled{' (dry run)' if args.dry_run else ''}: {summary}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,6 @@ NovoMarket Backend API - Fully Integrated & Fixed
 All features working, all imports resolved
 """
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Depends, Body, Request
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import uuid
@@ -16,7 +15,18 @@ from contextlib import asynccontextmanager
 from config import settings
 from database import database, get_db, init_indexes
 from utils.websocket_manager import connection_manager
-from utils.auth_utils import get_current_user
+from utils.auth_utils import get_current_user, password_hasher, token_versions
+from utils.cache import cache_stats
+from utils.static_files import UploadFiles
+from services.search_index import start_search_index, stop_search_index
+from services.suggest_index import start_suggest_index, stop_suggest_index
+from services.view_counter import view_counter, start_view_counter, stop_view_counter
+from services.chunked_uploads import start_chunked_upload_sweeper, stop_chunked_upload_sweeper
+from services.upload_storage import add_references, start_upload_collector, stop_upload_collector
+from services.image_derivatives import derivative_pool
+from services.payments import payments
+from services.stripe_events import start_stripe_event_consumer, stop_stripe_event_consumer
+from services.inventory_service import start_reservation_sweeper, stop_reservation_sweeper
 from models import User, TimeSlot, ServiceAvailability, Booking, BookingCreate, AvailabilityCreate
 
 # Import services
@@ -56,6 +66,34 @@ async def lifespan(app: FastAPI):
         except Exception as idx_err:
             logger.warning(f"⚠️ Index init failed (non-critical): {idx_err}")
         
+        # Load token versions for stateless JWT auth
+        if settings.JWT_STATELESS_CLAIMS:
+            try:
+                await token_versions.start()
+            except Exception as tv_err:
+                logger.warning(f"⚠️ Token versions not loaded, falling back to DB auth: {tv_err}")
+        
+        # Build the in-memory search and typeahead indexes in the background
+        start_suggest_index(settings.SUGGEST_INDEX_REBUILD_SECONDS)
+        if settings.SEARCH_BACKEND == "memory":
+            start_search_index(settings.SEARCH_INDEX_REBUILD_SECONDS)
+            logger.info("🔎 In-memory search index warming up")
+        
+        # Flush buffered listing view counts periodically
+        start_view_counter(settings.VIEW_COUNTER_FLUSH_SECONDS)
+        
+        # Garbage-collect abandoned chunked uploads
+        start_chunked_upload_sweeper(settings.CHUNKED_UPLOAD_SWEEP_SECONDS)
+        
+        # Delete stored files no listing or message uses any more
+        start_upload_collector(settings.UPLOAD_GC_SWEEP_SECONDS)
+        
+        # Apply queued Stripe webhook events in batches
+        start_stripe_event_consumer(settings.STRIPE_EVENT_POLL_SECONDS)
+        
+        # Return stock held by abandoned orders
+        start_reservation_sweeper(settings.STOCK_RESERVATION_SWEEP_SECONDS)
+        
         # Log configuration
         logger.info(f"📊 MongoDB: {settings.DB_NAME}")
         logger.info(f"📡 API Documentation: http://localhost:8000/docs")
@@ -71,6 +109,21 @@ async def lifespan(app: FastAPI):
         raise
     finally:
         # Cleanup
+        try:
+            await stop_view_counter()
+        except Exception as vc_err:
+            logger.warning(f"⚠️ Final view counter flush failed: {vc_err}")
+        await connection_manager.shutdown()
+        await stop_chunked_upload_sweeper()
+        await stop_upload_collector()
+        await stop_stripe_event_consumer()
+        await stop_reservation_sweeper()
+        await stop_search_index()
+        await stop_suggest_index()
+        await token_versions.stop()
+        password_hasher.shutdown()
+        derivative_pool.shutdown()
+        await payments.close()
         database.close()
         from database import redis_client
         if redis_client:
@@ -94,16 +147,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # ============ INCLUDE ROUTERS ============
-from routes import marketplace, notification_routes, service_request_routes, booking_routes
+from routes import marketplace, notification_routes, service_request_routes, booking_routes, upload_routes
 
 # Include all routers
 app.include_router(marketplace.router, prefix="/api", tags=["Marketplace"])
 app.include_router(notification_routes.router, prefix="/api", tags=["Notifications"])
 # app.include_router(service_request_routes.router, prefix="/api", tags=["Service Requests"])
 app.include_router(booking_routes.router, prefix="/api", tags=["Bookings"])
+app.include_router(upload_routes.router, prefix="/api", tags=["Uploads"])
 app.include_router(freelancer_routes.router, prefix="/api", tags=["Freelancer"])
 
 
@@ -122,7 +177,7 @@ if hasattr(notification_service, 'router'):
 
 # ============ STATIC FILES ============
 try:
-    app.mount("/uploads", StaticFiles(directory=str(settings.UPLOAD_DIR)), name="uploads")
+    app.mount("/uploads", UploadFiles(settings.UPLOAD_DIR), name="uploads")
     logger.info("✅ Static files mounted at /uploads")
 except Exception as e:
     logger.warning(f"⚠️ Failed to mount static files: {e}")
@@ -188,6 +243,9 @@ async def get_stats():
     return {
         "platform": settings.APP_NAME,
         "statistics": stats,
+        "caches": cache_stats(),
+        "view_counter": view_counter.stats(),
+        "websockets": connection_manager.stats(),
         "timestamp": datetime.now(timezone.utc).isoformat()
     }
 
@@ -222,13 +280,15 @@ async def chat_websocket(websocket: WebSocket, user_id: str):
             
             # Save message to database
             await db.messages.insert_one(message_doc.copy())
+            if file_url:
+                await add_references([file_url])
             
             # Send to receiver via WebSocket
             ws_message = {"type": "chat", "data": message_doc}
             await connection_manager.send_personal_message(receiver_id, ws_message)
             
-            # Echo back to sender
-            await websocket.send_json(ws_message)
+            # Echo back to sender (through its queue, so frames stay ordered)
+            await connection_manager.send(websocket, ws_message)
             
             # Send notification
             try:
@@ -0,0 +1,352 @@
+"""
+NovoMarket Chunked Uploads
+Resumable multi-part uploads: parts go straight to disk and are assembled zero-copy
+Location: backend/services/chunked_uploads.py
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException
+from pymongo import ReturnDocument
+
+from config import settings
+from database import get_db
+from services.upload_storage import commit_file, discard_file
+from utils.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Request body bytes gathered before each write to disk
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def parts_dir(upload_id: str) -> Path:
+    return settings.UPLOAD_TMP_DIR / "chunked" / upload_id
+
+
+def part_path(upload_id: str, part_number: int) -> Path:
+    return parts_dir(upload_id) / f"{part_number:06d}.part"
+
+
+def assembled_path(upload_id: str) -> Path:
+    return settings.UPLOAD_TMP_DIR / f"{upload_id}.assembled"
+
+
+def expected_part_size(upload: dict, part_number: int) -> int:
+    if part_number < upload["total_parts"]:
+        return upload["part_size"]
+    return upload["size"] - upload["part_size"] * (upload["total_parts"] - 1)
+
+
+def _expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=settings.CHUNKED_UPLOAD_TTL_SECONDS)
+
+
+def status_view(upload: dict) -> dict:
+    received = sorted(upload.get("received_parts", []))
+    received_set = set(received)
+    return {
+        "upload_id": upload["id"],
+        "filename": upload["filename"],
+        "size": upload["size"],
+        "part_size": upload["part_size"],
+        "total_parts": upload["total_parts"],
+        "received_parts": received,
+        "missing_parts": [n for n in range(1, upload["total_parts"] + 1) if n not in received_set],
+        "status": upload["status"],
+        "expires_at": upload["expires_at"].isoformat() if isinstance(upload["expires_at"], datetime) else upload["expires_at"],
+    }
+
+
+# ============ PROTOCOL ============
+
+async def init_upload(user_id: str, filename: str, size: int, content_type: Optional[str]) -> dict:
+    """Start an upload session; the client then PUTs parts 1..total_parts"""
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="File is empty")
+    if size > settings.CHUNKED_UPLOAD_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File size must be less than {settings.CHUNKED_UPLOAD_MAX_SIZE // (1024 * 1024)}MB"
+        )
+
+    part_size = settings.CHUNKED_UPLOAD_PART_SIZE
+    upload = {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "filename": filename,
+        "content_type": content_type,
+        "size": size,
+        "part_size": part_size,
+        "total_parts": math.ceil(size / part_size),
+        "received_parts": [],
+        "status": "pending",
+        "expires_at": _expiry(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+    await asyncio.to_thread(parts_dir(upload["id"]).mkdir, parents=True, exist_ok=True)
+    await get_db().chunked_uploads.insert_one(upload)
+    upload.pop("_id", None)
+    return upload
+
+
+async def get_upload(upload_id: str, user_id: str) -> dict:
+    upload = await get_db().chunked_uploads.find_one({"id": upload_id}, {"_id": 0})
+    if not upload or upload["user_id"] != user_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+
+def _write_all(handle, buffer: bytearray):
+    handle.write(buffer)
+
+
+async def write_part(upload: dict, part_number: int, body: AsyncIterator[bytes]) -> int:
+    """
+    Stream one part's request body to its own file
+
+    The part is written to a temp name and renamed when complete, so a
+    dropped connection never leaves a truncated part that counts as received.
+    Re-sending a part replaces it.
+    """
+    if upload["status"] != "pending":
+        raise HTTPException(status_code=409, detail=f"Upload is {upload['status']}")
+    if not 1 <= part_number <= upload["total_parts"]:
+        raise HTTPException(status_code=400, detail=f"Part number must be between 1 and {upload['total_parts']}")
+
+    expected = expected_part_size(upload, part_number)
+    final_path = part_path(upload["id"], part_number)
+    temp_path = final_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+
+    handle = await asyncio.to_thread(open, temp_path, "wb")
+    written = 0
+    try:
+        try:
+            buffer = bytearray()
+            async for chunk in body:
+                written += len(chunk)
+                if written > expected:
+                    raise HTTPException(status_code=400, detail=f"Part {part_number} must be {expected} bytes")
+                buffer += chunk
+                if len(buffer) >= WRITE_BUFFER_SIZE:
+                    await asyncio.to_thread(_write_all, handle, buffer)
+                    buffer = bytearray()
+            if buffer:
+                await asyncio.to_thread(_write_all, handle, buffer)
+        finally:
+            await asyncio.to_thread(handle.close)
+        if written != expected:
+            raise HTTPException(status_code=400, detail=f"Part {part_number} must be {expected} bytes, got {written}")
+        await asyncio.to_thread(os.replace, temp_path, final_path)
+    except BaseException:
+        await asyncio.to_thread(discard_file, temp_path)
+        raise
+
+    await get_db().chunked_uploads.update_one(
+        {"id": upload["id"]},
+        {"$addToSet": {"received_parts": part_number}, "$set": {"expires_at": _expiry()}}
+    )
+    return written
+
+
+def _append(src: Path, dst_fd: int, length: int):
+    """Append `src` to `dst_fd` in the kernel when the platform allows it"""
+    with open(src, "rb") as f:
+        src_fd = f.fileno()
+        copied = 0
+        try:
+            if hasattr(os, "copy_file_range"):
+                while copied < length:
+                    n = os.copy_file_range(src_fd, dst_fd, length - copied)
+                    if n == 0:
+                        break
+                    copied += n
+            elif hasattr(os, "sendfile"):
+                while copied < length:
+                    n = os.sendfile(dst_fd, src_fd, copied, length - copied)
+                    if n == 0:
+                        break
+                    copied += n
+        except OSError:
+            # e.g. EXDEV or a filesystem without support; finish with a plain copy
+            pass
+        if copied < length:
+            f.seek(copied)
+            os.lseek(dst_fd, 0, os.SEEK_END)
+            with os.fdopen(os.dup(dst_fd), "wb", closefd=True) as out:
+                shutil.copyfileobj(f, out, WRITE_BUFFER_SIZE)
+
+
+def _hash_into(hasher, src: Path):
+    with open(src, "rb") as f:
+        while chunk := f.read(WRITE_BUFFER_SIZE):
+            hasher.update(chunk)
+
+
+def _assemble(upload: dict) -> tuple:
+    """
+    Concatenate the parts into one temp file; returns (path, sha256 hex)
+
+    Each part is hashed just before it is appended, while it is still in the
+    page cache, so the assembled file is never read back.
+    """
+    target = assembled_path(upload["id"])
+    hasher = hashlib.sha256()
+    fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        for n in range(1, upload["total_parts"] + 1):
+            src = part_path(upload["id"], n)
+            _hash_into(hasher, src)
+            _append(src, fd, expected_part_size(upload, n))
+    finally:
+        os.close(fd)
+    return target, hasher.hexdigest()
+
+
+async def complete_upload(upload: dict) -> dict:
+    """Assemble the received parts into content-addressed storage"""
+    missing = status_view(upload)["missing_parts"]
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing parts: {missing[:20]}")
+
+    db = get_db()
+    claimed = await db.chunked_uploads.find_one_and_update(
+        {"id": upload["id"], "status": "pending"},
+        {"$set": {"status": "assembling", "assembling_since": datetime.now(timezone.utc)}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not claimed:
+        raise HTTPException(status_code=409, detail="Upload is already being completed")
+
+    try:
+        try:
+            assembled, digest = await asyncio.to_thread(_assemble, upload)
+        except BaseException:
+            await asyncio.to_thread(discard_file, assembled_path(upload["id"]))
+            raise
+        stored = await commit_file(assembled, digest, upload["size"], upload["filename"], upload["content_type"])
+    except BaseException:
+        await db.chunked_uploads.update_one(
+            {"id": upload["id"]},
+            {"$set": {"status": "pending"}, "$unset": {"assembling_since": ""}}
+        )
+        raise
+
+    await db.chunked_uploads.delete_one({"id": upload["id"]})
+    await asyncio.to_thread(shutil.rmtree, parts_dir(upload["id"]), True)
+    return stored
+
+
+async def abort_upload(upload: dict):
+    await get_db().chunked_uploads.delete_one({"id": upload["id"], "status": "pending"})
+    await asyncio.to_thread(shutil.rmtree, parts_dir(upload["id"]), True)
+
+
+# ============ ORPHAN SWEEPER ============
+
+def _sweep_orphan_dirs(known_ids: set, max_age: float) -> int:
+    """Remove part directories with no live session that have been idle past `max_age`"""
+    root = settings.UPLOAD_TMP_DIR / "chunked"
+    if not root.exists():
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age
+    for entry in root.iterdir():
+        if entry.name in known_ids:
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def _sweep_stray_temp_files(known_ids: set, max_age: float) -> int:
+    """
+    Remove `<uuid>.part` (single uploads) and `<id>.assembled` files left in
+    UPLOAD_TMP_DIR by crashed or cancelled requests once idle past `max_age`
+    """
+    root = settings.UPLOAD_TMP_DIR
+    if not root.exists():
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age
+    for entry in root.iterdir():
+        if entry.suffix not in (".part", ".assembled") or entry.stem in known_ids:
+            continue
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                entry.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+async def _reopen_stalled_assemblies(now: datetime) -> int:
+    """Hand sessions whose assembly died (e.g. the worker restarted) back to pending"""
+    db = get_db()
+    stalled = await db.chunked_uploads.find(
+        {"status": "assembling", "assembling_since": {"$lt": now - timedelta(seconds=settings.CHUNKED_UPLOAD_ASSEMBLE_TIMEOUT_SECONDS)}},
+        {"_id": 0, "id": 1, "assembling_since": 1}
+    ).to_list(None)
+    reopened = 0
+    for upload in stalled:
+        result = await db.chunked_uploads.update_one(
+            {"id": upload["id"], "status": "assembling", "assembling_since": upload["assembling_since"]},
+            {"$set": {"status": "pending"}, "$unset": {"assembling_since": ""}}
+        )
+        if result.modified_count:
+            await asyncio.to_thread(discard_file, assembled_path(upload["id"]))
+            reopened += 1
+    return reopened
+
+
+async def sweep_expired_uploads():
+    """Delete expired sessions and any part directories they left behind"""
+    db = get_db()
+    now = datetime.now(timezone.utc)
+    # Reopened first, so one that has also expired is deleted below
+    reopened = await _reopen_stalled_assemblies(now)
+    expired = await db.chunked_uploads.find(
+        {"expires_at": {"$lt": now}, "status": "pending"}, {"_id": 0, "id": 1}
+    ).to_list(None)
+    for upload in expired:
+        result = await db.chunked_uploads.delete_one({"id": upload["id"], "status": "pending"})
+        if result.deleted_count:
+            await asyncio.to_thread(shutil.rmtree, parts_dir(upload["id"]), True)
+
+    live = await db.chunked_uploads.distinct("id")
+    orphans = await asyncio.to_thread(_sweep_orphan_dirs, set(live), settings.CHUNKED_UPLOAD_TTL_SECONDS)
+    strays = await asyncio.to_thread(_sweep_stray_temp_files, set(live), settings.CHUNKED_UPLOAD_TTL_SECONDS)
+    if expired or orphans or reopened or strays:
+        logger.info(
+            f"🧹 Swept {len(expired)} expired chunked uploads, {orphans} orphaned part directories, "
+            f"{strays} stray temp files, reopened {reopened} stalled assemblies"
+        )
+
+
+_sweeper: Optional[PeriodicTask] = None
+
+
+def start_chunked_upload_sweeper(interval: float):
+    global _sweeper
+    _sweeper = PeriodicTask("Chunked upload sweep", sweep_expired_uploads, interval)
+    _sweeper.start()
+
+
+async def stop_chunked_upload_sweeper():
+    if _sweeper:
+        await _sweeper.stop()
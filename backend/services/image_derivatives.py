@@ -0,0 +1,170 @@
+"""
+NovoMarket Image Derivatives
+Thumbnail widths and WebP renditions of uploaded images, generated in a process pool
+Location: backend/services/image_derivatives.py
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from config import settings
+from database import get_db
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: without Pillow, originals are served as-is
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "gif", "bmp", "tiff"}
+
+# Decompression-bomb guard for worker processes (about 8K x 8K)
+MAX_IMAGE_PIXELS = 64_000_000
+
+
+# ============ NAMING ============
+
+def derivative_name(digest: str, width: Optional[int] = None) -> str:
+    """
+    <hash>_w<width>.webp for thumbnails, <hash>_full.webp for the full-size WebP
+
+    Derivatives always carry a suffix, so none can share a name with a .webp
+    original (<hash>.webp).
+    """
+    return f"{digest}_w{width}.webp" if width else f"{digest}_full.webp"
+
+
+def image_variants(images: List[str], widths: List[int] = None) -> List[Dict[str, str]]:
+    """
+    Derivative URLs for each listing image, aligned with `images`
+
+    Only content-addressed uploads get variants ({"w320": url, ..., "webp": url});
+    other URLs map to {}. Names are deterministic, so URLs are valid before
+    generation finishes and the static handler falls back to the original
+    for derivatives that do not exist (yet, or because the image is small).
+    """
+    prefix = settings.UPLOAD_URL_PREFIX
+    widths = widths or settings.IMAGE_DERIVATIVE_WIDTHS
+    variants = []
+    for url in images:
+        if not isinstance(url, str) or not url.startswith(prefix):
+            variants.append({})
+            continue
+        filename = url[len(prefix):]
+        digest, _, ext = filename.partition(".")
+        if len(digest) != 64 or ext.lower() not in IMAGE_EXTENSIONS:
+            variants.append({})
+            continue
+        entry = {f"w{w}": f"{prefix}{derivative_name(digest, w)}" for w in widths}
+        entry["webp"] = f"{prefix}{derivative_name(digest)}"
+        variants.append(entry)
+    return variants
+
+
+# ============ WORKER ============
+
+def _save_webp(img, path: Path, quality: int):
+    temp = path.with_suffix(".webp.tmp")
+    img.save(temp, "WEBP", quality=quality, method=4)
+    os.replace(temp, path)
+
+
+def _generate(source: str, digest: str, widths: List[int], quality: int) -> List[str]:
+    """Runs in a worker process; returns the derivative filenames written"""
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+    out_dir = Path(source).parent
+    written = []
+    with Image.open(source) as img:
+        source_format = img.format
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "P") else "RGB")
+
+        if source_format != "WEBP":
+            name = derivative_name(digest)
+            _save_webp(img, out_dir / name, quality)
+            written.append(name)
+
+        for i, width in enumerate(sorted(widths)):
+            # Never upscale; the original serves requests for larger widths
+            if width >= img.width:
+                if i == 0:
+                    # Narrower than every width: the smallest variant is the
+                    # image at its native width, so grids still get a WebP
+                    name = derivative_name(digest, width)
+                    _save_webp(img, out_dir / name, quality)
+                    written.append(name)
+                break
+            height = max(1, round(img.height * width / img.width))
+            name = derivative_name(digest, width)
+            _save_webp(img.resize((width, height), Image.LANCZOS), out_dir / name, quality)
+            written.append(name)
+    return written
+
+
+# ============ POOL ============
+
+class ImageDerivativePool:
+    """Generates derivatives in a bounded process pool, off the request path"""
+
+    def __init__(self, max_workers: int, widths: List[int], quality: int):
+        self.max_workers = max_workers
+        self.widths = widths
+        self.quality = quality
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return Image is not None and self.max_workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"✅ Image derivative pool started ({self.max_workers} workers)")
+        return self._executor
+
+    def enqueue(self, path: Path, digest: str):
+        """Schedule derivative generation for a newly stored image; returns immediately"""
+        if not self.enabled or path.suffix.lstrip(".").lower() not in IMAGE_EXTENSIONS:
+            return
+        task = asyncio.get_running_loop().create_task(self.generate(path, digest))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def generate(self, path: Path, digest: str) -> List[str]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers * 2)
+        try:
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                written = await loop.run_in_executor(
+                    self._get_executor(), _generate, str(path), digest, self.widths, self.quality
+                )
+            await get_db().uploads.update_one({"hash": digest}, {"$set": {"derivatives": written}})
+            return written
+        except Exception as e:
+            logger.warning(f"⚠️ Image derivatives failed for {path.name}: {e}")
+            return []
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+derivative_pool = ImageDerivativePool(
+    settings.IMAGE_DERIVATIVE_WORKERS,
+    settings.IMAGE_DERIVATIVE_WIDTHS,
+    settings.IMAGE_DERIVATIVE_QUALITY
+)
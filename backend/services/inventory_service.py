@@ -0,0 +1,323 @@
+"""
+NovoMarket Inventory Service
+Atomic stock reservations for checkout, released automatically when abandoned
+Location: backend/services/inventory_service.py
+
+A product order takes its stock when it is placed, with a single conditional
+`$inc` guarded by `stock >= quantity`, so concurrent buyers can never push
+stock below zero. Each hold is recorded in `stock_reservations`; payment
+commits it, and the sweeper hands expired holds back to the listing.
+Orders carry `stock_state`: reserved -> committed | released (untracked for
+services, which have no stock).
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from config import settings
+from database import get_db
+from utils.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+RESERVED = "reserved"
+COMMITTED = "committed"
+RELEASED = "released"
+UNTRACKED = "untracked"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _purge_at(now: datetime) -> datetime:
+    return now + timedelta(seconds=settings.STOCK_RESERVATION_RETENTION_SECONDS)
+
+
+def _invalidate(listing_ids: Iterable[str]):
+    # Imported lazily: the marketplace routes import this module
+    from routes.marketplace import invalidate_listing
+    for listing_id in listing_ids:
+        invalidate_listing(listing_id)
+
+
+async def _apply_stock_deltas(deltas: Dict[str, int]):
+    deltas = {lid: qty for lid, qty in deltas.items() if qty}
+    if not deltas:
+        return
+    await get_db().listings.bulk_write(
+        [UpdateOne({"id": lid}, {"$inc": {"stock": qty}}) for lid, qty in deltas.items()],
+        ordered=False
+    )
+    _invalidate(deltas)
+
+
+def _reservation(order_id: str, listing_id: str, buyer_id: str, quantity: int, now: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "order_id": order_id,
+        "listing_id": listing_id,
+        "buyer_id": buyer_id,
+        "quantity": quantity,
+        "status": "held",
+        "created_at": now,
+        "expires_at": now + timedelta(seconds=settings.STOCK_RESERVATION_TTL_SECONDS),
+    }
+
+
+# ============ RESERVING ============
+
+async def reserve_stock(listing_id: str, quantity: int, order_id: str, buyer_id: str) -> bool:
+    """
+    Take `quantity` units for an order; returns False when stock is short
+
+    The guarded `$inc` is the whole decision, so there is no window between
+    checking and taking stock. The reservation record is written after it:
+    a crash in between strands stock (undersells) rather than overselling.
+    """
+    db = get_db()
+    result = await db.listings.update_one(
+        {"id": listing_id, "stock": {"$gte": quantity}},
+        {"$inc": {"stock": -quantity}}
+    )
+    if result.modified_count == 0:
+        return False
+
+    await db.stock_reservations.update_one(
+        {"order_id": order_id},
+        {"$set": _reservation(order_id, listing_id, buyer_id, quantity, _now()), "$unset": {"purge_at": "", "reacquiring_since": ""}},
+        upsert=True
+    )
+    _invalidate([listing_id])
+    return True
+
+
+async def reserve_cart(items: List[dict], buyer_id: str) -> Optional[str]:
+    """
+    Take stock for several orders at once
+
+    `items` are {"order_id", "listing_id", "quantity"} with one item per
+    listing. Returns None when every item was reserved, else the listing_id
+    of an item that ran short, after handing back whatever was taken.
+
+    One guarded `$inc` per item, sent concurrently: N operations whose
+    latency overlaps, not a single bulk round trip. Each one's matched_count
+    says exactly whether it took its stock, which an unordered bulk_write
+    does not report per item. A listing deleted since it was loaded simply
+    fails to match.
+    """
+    if not items:
+        return None
+    db = get_db()
+    results = await asyncio.gather(*(
+        db.listings.update_one(
+            {"id": item["listing_id"], "stock": {"$gte": item["quantity"]}},
+            {"$inc": {"stock": -item["quantity"]}}
+        )
+        for item in items
+    ))
+    short = [item for item, result in zip(items, results) if result.matched_count == 0]
+    if short:
+        applied = [item for item, result in zip(items, results) if result.matched_count]
+        await _apply_stock_deltas({item["listing_id"]: item["quantity"] for item in applied})
+        return short[0]["listing_id"]
+
+    now = _now()
+    await db.stock_reservations.insert_many(
+        [_reservation(i["order_id"], i["listing_id"], buyer_id, i["quantity"], now) for i in items],
+        ordered=False
+    )
+    _invalidate(item["listing_id"] for item in items)
+    return None
+
+
+async def extend_holds(order_ids: List[str], until: datetime) -> int:
+    """Push live holds' expiry out to `until`; returns how many are held"""
+    result = await get_db().stock_reservations.update_many(
+        {"order_id": {"$in": order_ids}, "status": "held"},
+        {"$max": {"expires_at": until}}
+    )
+    return result.matched_count
+
+
+async def hold_for_checkout(order: dict, until: datetime) -> bool:
+    """
+    Make sure an order's stock stays held until `until`
+
+    Extends a live hold, or re-reserves one the sweeper released, whatever
+    the order's stock_state says by now. At most one caller wins the
+    re-reservation. Returns False when the stock is gone.
+    """
+    db = get_db()
+    state = order.get("stock_state")
+    if state in (None, COMMITTED, UNTRACKED):
+        return True
+
+    if await extend_holds([order["id"]], until):
+        return True
+
+    # No live hold. The released reservation record is the lock: flipping it
+    # to "reacquiring" lets exactly one caller take the stock again (one left
+    # behind by a crashed caller is reclaimable after a minute)
+    now = _now()
+    claimed = await db.stock_reservations.update_one(
+        {"order_id": order["id"], "$or": [
+            {"status": "released"},
+            {"status": "reacquiring", "reacquiring_since": {"$lt": now - timedelta(minutes=1)}},
+        ]},
+        {"$set": {"status": "reacquiring", "reacquiring_since": now}}
+    )
+    if claimed.modified_count == 0:
+        if await db.stock_reservations.count_documents({"order_id": order["id"]}):
+            # Another request re-reserved it first (or is doing so right now)
+            return await extend_holds([order["id"]], until) > 0
+        # The record has been purged, long after the sweeper marked the
+        # order released; the order's own state is the lock then
+        claimed = await db.orders.update_one(
+            {"id": order["id"], "stock_state": RELEASED},
+            {"$set": {"stock_state": RESERVED}}
+        )
+        if claimed.modified_count == 0:
+            return await extend_holds([order["id"]], until) > 0
+
+    if not await reserve_stock(order["listing_id"], order["quantity"], order["id"], order["buyer_id"]):
+        await db.stock_reservations.update_one(
+            {"order_id": order["id"], "status": "reacquiring"},
+            {"$set": {"status": "released"}, "$unset": {"reacquiring_since": ""}}
+        )
+        await db.orders.update_one({"id": order["id"]}, {"$set": {"stock_state": RELEASED}})
+        return False
+    await db.orders.update_one({"id": order["id"]}, {"$set": {"stock_state": RESERVED}})
+    await extend_holds([order["id"]], until)
+    return True
+
+
+# ============ COMMITTING ============
+
+async def commit_orders(orders: list) -> int:
+    """
+    Commit stock for paid orders; returns the number of units moved
+
+    Held reservations just flip to committed. A hold the sweeper released
+    first, and legacy orders placed before reservations existed, still take
+    their stock now: the payment has been captured. Each of those is claimed
+    with a conditional write on its stock_state before its stock is taken,
+    so overlapping calls for the same order decrement it once.
+    """
+    db = get_db()
+    now = _now()
+    reserved = [o for o in orders if o.get("stock_state") == RESERVED]
+    unreserved = [o for o in orders if o.get("stock_state") in (None, RELEASED)]
+    moved = 0
+
+    if reserved:
+        await db.stock_reservations.update_many(
+            {"order_id": {"$in": [o["id"] for o in reserved]}, "status": "held"},
+            {"$set": {"status": "committed", "committed_at": now, "purge_at": _purge_at(now)}}
+        )
+        committed = set(await db.stock_reservations.distinct(
+            "order_id", {"order_id": {"$in": [o["id"] for o in reserved]}, "status": "committed"}
+        ))
+        lost = [o for o in reserved if o["id"] not in committed]
+        if lost:
+            logger.warning(f"⚠️ {len(lost)} paid orders lost their stock hold; taking stock now")
+            unreserved += lost
+        held = [o["id"] for o in reserved if o["id"] in committed]
+        if held:
+            await db.orders.update_many({"id": {"$in": held}}, {"$set": {"stock_state": COMMITTED}})
+            moved += sum(o.get("quantity", 1) for o in reserved if o["id"] in committed)
+
+    deltas = defaultdict(int)
+    for order in unreserved:
+        claimed = await db.orders.update_one(
+            {"id": order["id"], "stock_state": {"$in": [None, RESERVED, RELEASED]}},
+            {"$set": {"stock_state": COMMITTED}}
+        )
+        if claimed.modified_count and order.get("listing_id"):
+            deltas[order["listing_id"]] -= order.get("quantity", 1)
+            moved += order.get("quantity", 1)
+    await _apply_stock_deltas(deltas)
+    return moved
+
+
+# ============ RELEASING ============
+
+async def _release(reservations: list, claim_filter: dict, now: datetime) -> List[str]:
+    """Flip held reservations to released and hand their stock back; returns order ids"""
+    db = get_db()
+    deltas = defaultdict(int)
+    released = []
+    for reservation in reservations:
+        # Conditional on "held": a payment committing it concurrently wins or loses cleanly
+        result = await db.stock_reservations.update_one(
+            {"id": reservation["id"], "status": "held", **claim_filter},
+            {"$set": {"status": "released", "released_at": now, "purge_at": _purge_at(now)}}
+        )
+        if result.modified_count:
+            deltas[reservation["listing_id"]] += reservation["quantity"]
+            released.append(reservation["order_id"])
+
+    if released:
+        await _apply_stock_deltas(deltas)
+        await db.orders.update_many(
+            {"id": {"$in": released}, "stock_state": RESERVED},
+            {"$set": {"stock_state": RELEASED}}
+        )
+    return released
+
+
+async def release_orders(order_ids: List[str]) -> int:
+    """Give back the stock held for orders that will not be paid; returns holds released"""
+    reservations = await get_db().stock_reservations.find(
+        {"order_id": {"$in": order_ids}, "status": "held"},
+        {"_id": 0, "id": 1, "order_id": 1, "listing_id": 1, "quantity": 1}
+    ).to_list(len(order_ids))
+    return len(await _release(reservations, {}, _now()))
+
+
+async def release_expired_reservations(limit: int = 1000) -> int:
+    """Return stock held by abandoned orders; returns the number of holds released"""
+    db = get_db()
+    now = _now()
+    expired = await db.stock_reservations.find(
+        {"status": "held", "expires_at": {"$lt": now}},
+        {"_id": 0, "id": 1, "order_id": 1, "listing_id": 1, "quantity": 1}
+    ).limit(limit).to_list(limit)
+    if not expired:
+        return 0
+
+    # A paid order whose commit was interrupted keeps its stock: finish the
+    # commit instead of handing the units back to be sold twice
+    paid = await db.orders.find(
+        {"id": {"$in": [r["order_id"] for r in expired]}, "payment_status": "paid"},
+        {"_id": 0, "id": 1, "listing_id": 1, "quantity": 1, "stock_state": 1}
+    ).to_list(len(expired))
+    if paid:
+        await commit_orders(paid)
+        paid_ids = {o["id"] for o in paid}
+        expired = [r for r in expired if r["order_id"] not in paid_ids]
+
+    released = await _release(expired, {"expires_at": {"$lt": now}}, now)
+    if released:
+        logger.info(f"🧹 Released {len(released)} expired stock reservations")
+    return len(released)
+
+
+_sweeper: Optional[PeriodicTask] = None
+
+
+def start_reservation_sweeper(interval: float):
+    global _sweeper
+    _sweeper = PeriodicTask("Stock reservation sweep", release_expired_reservations, interval)
+    _sweeper.start()
+
+
+async def stop_reservation_sweeper():
+    if _sweeper:
+        await _sweeper.stop()
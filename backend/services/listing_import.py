@@ -0,0 +1,202 @@
+"""
+NovoMarket Bulk Listing Import
+Streams CSV / NDJSON catalogs into batched bulk writes with a per-row report
+Location: backend/services/listing_import.py
+"""
+
+import codecs
+import csv
+import json
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Error entries kept in the report; the counters stay exact past this
+MAX_REPORTED_ERRORS = 1000
+
+# CSV list columns hold several values separated by this character
+CSV_LIST_SEPARATOR = "|"
+CSV_LIST_FIELDS = ("images", "tags")
+
+
+# ============ STREAM PARSING ============
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream into lines without buffering the whole body"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    remainder = ""
+    async for chunk in chunks:
+        text = remainder + decoder.decode(chunk)
+        lines = text.split("\n")
+        remainder = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    remainder += decoder.decode(b"", final=True)
+    if remainder:
+        yield remainder.rstrip("\r")
+
+
+def _csv_row(header: List[str], values: List[str]) -> Dict[str, Any]:
+    row: Dict[str, Any] = {}
+    for key, value in zip(header, values):
+        value = value.strip()
+        if not key or value == "":
+            continue
+        if key in CSV_LIST_FIELDS:
+            row[key] = [v.strip() for v in value.split(CSV_LIST_SEPARATOR) if v.strip()]
+        else:
+            row[key] = value
+    return row
+
+
+async def stream_records(
+    chunks: AsyncIterator[bytes],
+    fmt: str
+) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yield (row_number, record, parse_error) for each row of the body
+
+    NDJSON rows are JSON objects, one per line. CSV needs a header row;
+    quoted fields may span lines and list columns use "|" separators.
+    Row numbers are 1-based data rows (the CSV header is not counted).
+    """
+    row_number = 0
+    if fmt == "ndjson":
+        async for line in _lines(chunks):
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield row_number, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, "Row must be a JSON object"
+                continue
+            yield row_number, record, None
+        return
+
+    header: Optional[List[str]] = None
+    pending = ""
+    async for line in _lines(chunks):
+        # A record continues while it has an unbalanced quote
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        record_text, pending = pending, ""
+        if not record_text.strip():
+            continue
+        values = next(csv.reader([record_text]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        row_number += 1
+        yield row_number, _csv_row(header, values), None
+
+    if pending:
+        yield row_number + 1, None, "Unterminated quoted field"
+
+
+# ============ REPORT ============
+
+class ImportReport:
+    """Per-row outcome of a bulk import or update"""
+
+    def __init__(self):
+        self.rows = 0
+        self.written = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def fail(self, row: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": error})
+
+    def to_dict(self, written_key: str) -> dict:
+        return {
+            "rows": self.rows,
+            written_key: self.written,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+# ============ BATCHED WRITES ============
+
+async def run_bulk(
+    records: AsyncIterator[Tuple[int, Optional[dict], Optional[str]]],
+    build_op: Callable[[dict], Any],
+    flush: Callable[[List[Tuple[int, Any]], ImportReport], Awaitable[None]],
+    batch_size: int,
+    max_rows: int
+) -> ImportReport:
+    """
+    Validate rows one at a time and hand them to `flush` in batches
+
+    `build_op` turns a record into a write operation or raises
+    ValueError/pydantic ValidationError; `flush` performs the writes and
+    records per-row failures. Memory stays bounded by `batch_size`.
+    """
+    report = ImportReport()
+    batch: List[Tuple[int, Any]] = []
+
+    async for row, record, parse_error in records:
+        if report.rows >= max_rows:
+            report.fail(row, f"Row limit of {max_rows} exceeded; remaining rows ignored")
+            break
+        report.rows += 1
+        if parse_error:
+            report.fail(row, parse_error)
+            continue
+        try:
+            batch.append((row, build_op(record)))
+        except ValueError as e:
+            # pydantic.ValidationError subclasses ValueError
+            report.fail(row, _short_error(e))
+            continue
+        if len(batch) >= batch_size:
+            await flush(batch, report)
+            batch = []
+
+    if batch:
+        await flush(batch, report)
+    return report
+
+
+async def bulk_write_batch(collection, batch: List[Tuple[int, Any]], report: ImportReport) -> List[int]:
+    """
+    Run one unordered bulk_write; returns the rows that failed
+
+    Successful writes are added to report.written and failures are recorded
+    against their original row numbers.
+    """
+    failed_rows = []
+    try:
+        result = await collection.bulk_write([op for _, op in batch], ordered=False)
+        report.written += result.inserted_count + result.matched_count
+    except BulkWriteError as e:
+        details = e.details
+        report.written += details.get("nInserted", 0) + details.get("nMatched", 0)
+        for write_error in details.get("writeErrors", []):
+            row = batch[write_error["index"]][0]
+            failed_rows.append(row)
+            report.fail(row, write_error.get("errmsg", "Write failed"))
+    return failed_rows
+
+
+def _short_error(e: Exception) -> str:
+    errors = getattr(e, "errors", None)
+    if callable(errors):
+        try:
+            return "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in errors()
+            )
+        except Exception:
+            pass
+    return str(e)
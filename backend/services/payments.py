@@ -0,0 +1,115 @@
+"""
+NovoMarket Payments Client
+Non-blocking Stripe calls over a pooled httpx.AsyncClient with timeouts and retries
+Location: backend/services/payments.py
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import httpx
+import stripe
+from fastapi import HTTPException
+
+from config import settings
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentsClient:
+    """
+    Async wrapper around stripe.StripeClient
+
+    Requests go through stripe's HTTPXClient, so every call awaits a pooled,
+    keep-alive httpx.AsyncClient instead of blocking the event loop. Network
+    errors and 409/429/5xx responses are retried with backoff up to
+    `max_network_retries` times; POSTs carry an idempotency key so retries
+    never create duplicate sessions. `api_base` points the client at a
+    Stripe-compatible stub for offline load tests.
+
+    Session status lookups are cached for `session_cache_ttl` seconds and
+    coalesced, so any number of concurrent polls for one session cost at
+    most one Stripe request per TTL.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        api_base: Optional[str] = None,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_network_retries: int = 2,
+        session_cache_ttl: float = 3.0
+    ):
+        self.api_key = api_key
+        self.api_base = api_base
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_network_retries = max_network_retries
+        self._http_client: Optional[stripe.HTTPXClient] = None
+        self._client: Optional[stripe.StripeClient] = None
+        self.session_cache = TTLCache("stripe_sessions", maxsize=10000, ttl=session_cache_ttl)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def client(self) -> stripe.StripeClient:
+        if self._client is None:
+            if not self.api_key:
+                raise HTTPException(status_code=503, detail="Payments are not configured")
+            self._http_client = stripe.HTTPXClient(
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout)
+            )
+            self._client = stripe.StripeClient(
+                self.api_key,
+                http_client=self._http_client,
+                max_network_retries=self.max_network_retries,
+                base_addresses={"api": self.api_base} if self.api_base else None,
+            )
+            logger.info(f"✅ Stripe client ready ({self.api_base or 'api.stripe.com'})")
+        return self._client
+
+    async def create_checkout_session(self, params: dict) -> stripe.checkout.Session:
+        return await self.client.v1.checkout.sessions.create_async(params=params)
+
+    async def retrieve_checkout_session(self, session_id: str) -> stripe.checkout.Session:
+        return await self.client.v1.checkout.sessions.retrieve_async(session_id)
+
+    async def session_status(self, session_id: str) -> dict:
+        """{"status", "payment_status"} of a session, cached and single-flight"""
+        cached = self.session_cache.get(session_id)
+        if cached is not None:
+            return cached
+        lookup = self._inflight.get(session_id)
+        if lookup is None:
+            lookup = asyncio.ensure_future(self._fetch_session_status(session_id))
+            self._inflight[session_id] = lookup
+            lookup.add_done_callback(lambda _: self._inflight.pop(session_id, None))
+        # Shielded: one poller disconnecting must not cancel the others' lookup
+        return await asyncio.shield(lookup)
+
+    async def _fetch_session_status(self, session_id: str) -> dict:
+        session = await self.retrieve_checkout_session(session_id)
+        result = {"status": session.status, "payment_status": session.payment_status}
+        self.session_cache.set(session_id, result)
+        return result
+
+    def construct_event(self, payload: bytes, sig_header: Optional[str], secret: Optional[str]) -> stripe.Event:
+        """Verify a webhook signature (local HMAC; no network call)"""
+        return stripe.Webhook.construct_event(payload=payload, sig_header=sig_header, secret=secret)
+
+    async def close(self):
+        if self._http_client is not None:
+            await self._http_client.close_async()
+            self._http_client = None
+            self._client = None
+
+
+payments = PaymentsClient(
+    settings.STRIPE_API_KEY,
+    api_base=settings.STRIPE_API_BASE,
+    timeout=settings.STRIPE_TIMEOUT_SECONDS,
+    max_network_retries=settings.STRIPE_MAX_NETWORK_RETRIES,
+    session_cache_ttl=settings.STRIPE_SESSION_CACHE_SECONDS
+)
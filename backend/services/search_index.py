@@ -0,0 +1,250 @@
+"""
+NovoMarket In-Memory Listing Search
+BM25 inverted index over listing titles, descriptions and tags
+Location: backend/services/search_index.py
+"""
+
+import asyncio
+import heapq
+import logging
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from database import get_db
+from utils.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# ============ TEXT ANALYSIS ============
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or "
+    "that the this to was were will with your you our we".split()
+)
+
+def stem(token: str) -> str:
+    """Light English stemmer: folds plurals and -ing/-ed endings"""
+    if len(token) <= 3:
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith(("sses", "xes", "zes", "ches", "shes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+    for suffix in ("ing", "ed"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[:-len(suffix)]
+            # running -> runn -> run
+            if token[-1] == token[-2] and token[-1] not in "lsz":
+                token = token[:-1]
+            break
+    return token
+
+
+def analyze(text: str) -> List[str]:
+    """Lowercase, tokenize, drop stopwords and stem"""
+    return [stem(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def listing_terms(doc: dict) -> Counter:
+    """Term frequencies for a listing; title and tags count double"""
+    terms = Counter(analyze(doc.get("description") or ""))
+    for field in (doc.get("title") or "", " ".join(doc.get("tags") or [])):
+        for term in analyze(field):
+            terms[term] += 2
+    return terms
+
+
+# ============ INDEX ============
+
+class ListingSearchIndex:
+    """
+    BM25 inverted index kept in process memory
+
+    Updated incrementally by the listing routes and rebuilt from a MongoDB
+    snapshot at startup. Holds only postings and the few fields needed for
+    filtering; result documents are still loaded from MongoDB by id.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.warm = False
+        self._reset()
+        # Changes made while a rebuild is running, replayed after the swap
+        self._pending: Optional[list] = None
+
+    def _reset(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_terms: Dict[str, Counter] = {}
+        self.doc_len: Dict[str, int] = {}
+        self.meta: Dict[str, dict] = {}
+        self.total_len = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    # ----- maintenance -----
+
+    def upsert(self, doc: dict):
+        """Add or replace a listing"""
+        if self._pending is not None:
+            self._pending.append(("upsert", doc))
+        self._upsert(doc)
+
+    def remove(self, listing_id: str):
+        """Drop a listing"""
+        if self._pending is not None:
+            self._pending.append(("remove", listing_id))
+        self._remove(listing_id)
+
+    def _upsert(self, doc: dict):
+        listing_id = doc["id"]
+        self._remove(listing_id)
+
+        terms = listing_terms(doc)
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[listing_id] = tf
+        length = sum(terms.values())
+        self.doc_terms[listing_id] = terms
+        self.doc_len[listing_id] = length
+        self.total_len += length
+        self.meta[listing_id] = {
+            "category": doc.get("category"),
+            "type": doc.get("type"),
+            "price": doc.get("price"),
+        }
+
+    def _remove(self, listing_id: str):
+        terms = self.doc_terms.pop(listing_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(listing_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_len -= self.doc_len.pop(listing_id, 0)
+        self.meta.pop(listing_id, None)
+
+    async def rebuild_from_db(self, batch_size: int = 1000):
+        """Rebuild from a MongoDB snapshot without blocking the event loop for long"""
+        db = get_db()
+        fresh = ListingSearchIndex(self.k1, self.b)
+        self._pending = []
+        try:
+            cursor = db.listings.find(
+                {},
+                {"_id": 0, "id": 1, "title": 1, "description": 1, "tags": 1,
+                 "category": 1, "type": 1, "price": 1}
+            ).batch_size(batch_size)
+            count = 0
+            async for doc in cursor:
+                fresh._upsert(doc)
+                count += 1
+                if count % batch_size == 0:
+                    await asyncio.sleep(0)
+
+            self.postings, self.doc_terms = fresh.postings, fresh.doc_terms
+            self.doc_len, self.meta, self.total_len = fresh.doc_len, fresh.meta, fresh.total_len
+            for op, arg in self._pending:
+                if op == "upsert":
+                    self._upsert(arg)
+                else:
+                    self._remove(arg)
+            self.warm = True
+        finally:
+            self._pending = None
+
+    # ----- querying -----
+
+    def _matches(self, listing_id: str, category, type, min_price, max_price) -> bool:
+        meta = self.meta[listing_id]
+        if category and meta["category"] != category:
+            return False
+        if type and meta["type"] != type:
+            return False
+        price = meta["price"]
+        if min_price is not None and (price is None or price < min_price):
+            return False
+        if max_price is not None and (price is None or price > max_price):
+            return False
+        return True
+
+    def search(
+        self,
+        query: str,
+        limit: int = 50,
+        after: Optional[Tuple[float, str]] = None,
+        category: Optional[str] = None,
+        type: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> List[Tuple[float, str]]:
+        """
+        Rank listings for a query with BM25
+
+        Returns (score, listing_id) pairs ordered by score desc then id asc.
+        `after` is the last pair of the previous page.
+        """
+        terms = set(analyze(query))
+        n_docs = len(self.doc_len)
+        if not terms or not n_docs:
+            return []
+
+        avg_len = self.total_len / n_docs
+        scores: Dict[str, float] = {}
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for listing_id, tf in postings.items():
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_len[listing_id] / avg_len)
+                scores[listing_id] = scores.get(listing_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+        filtered = any(v is not None for v in (category, type, min_price, max_price))
+        ranked = (
+            (-score, listing_id) for listing_id, score in scores.items()
+            if not filtered or self._matches(listing_id, category, type, min_price, max_price)
+        )
+        if after is not None:
+            boundary = (-after[0], after[1])
+            ranked = (key for key in ranked if key > boundary)
+
+        return [(-neg, listing_id) for neg, listing_id in heapq.nsmallest(limit, ranked)]
+
+
+# Global index instance
+search_index = ListingSearchIndex()
+
+# ============ BACKGROUND REBUILD ============
+
+async def _rebuild():
+    await search_index.rebuild_from_db()
+    logger.info(f"🔎 Search index rebuilt ({len(search_index)} listings)")
+
+
+_rebuild_task: Optional[PeriodicTask] = None
+
+
+def start_search_index(rebuild_interval: int):
+    """
+    Build the index in the background, then rebuild it every `rebuild_interval`
+    seconds so changes made by other worker processes converge (0 = build once)
+    """
+    global _rebuild_task
+    _rebuild_task = PeriodicTask("Search index rebuild", _rebuild, rebuild_interval)
+    _rebuild_task.start()
+
+
+async def stop_search_index():
+    if _rebuild_task:
+        await _rebuild_task.stop()
@@ -0,0 +1,235 @@
+"""
+NovoMarket Stripe Event Queue
+Durable webhook ingestion and an idempotent, batched background consumer
+Location: backend/services/stripe_events.py
+"""
+
+import logging
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Iterable, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from config import settings
+from database import get_db
+from services.inventory_service import RELEASED, RESERVED, commit_orders
+from utils.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Event types that carry a paid checkout session
+PAID_SESSION_EVENTS = ("checkout.session.completed", "checkout.session.async_payment_succeeded")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ============ INGESTION ============
+
+async def ingest_event(event) -> bool:
+    """
+    Persist a verified webhook event; returns False for a duplicate delivery
+
+    Only the fields the consumer needs are kept. The unique event_id index
+    makes Stripe's retries and duplicate deliveries no-ops.
+    """
+    session = event["data"]["object"] if event["type"].startswith("checkout.session.") else {}
+    doc = {
+        "event_id": event["id"],
+        "type": event["type"],
+        "session_id": session.get("id"),
+        "payment_status": session.get("payment_status"),
+        "status": "pending",
+        "attempts": 0,
+        "received_at": _now(),
+    }
+    try:
+        await get_db().stripe_events.insert_one(doc)
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+# ============ APPLYING PAYMENTS ============
+
+async def apply_paid_sessions(session_ids: Iterable[str]) -> dict:
+    """
+    Mark checkout sessions paid and commit their stock, idempotently
+
+    Transactions and orders are updated with filtered multi-document writes,
+    and stock is committed for any paid order still owing it, so applying a
+    session again (from the webhook queue, a status poll or a retry after a
+    failure part-way through) finishes the job without repeating any of it.
+    """
+    session_ids = list(set(s for s in session_ids if s))
+    if not session_ids:
+        return {"transactions": 0, "orders": 0}
+
+    db = get_db()
+    transactions = await db.payment_transactions.find(
+        {"session_id": {"$in": session_ids}},
+        {"_id": 0, "session_id": 1, "order_id": 1, "order_ids": 1}
+    ).to_list(len(session_ids))
+    if not transactions:
+        return {"transactions": 0, "orders": 0}
+
+    tx_result = await db.payment_transactions.update_many(
+        {"session_id": {"$in": session_ids}, "payment_status": {"$ne": "paid"}},
+        {"$set": {"payment_status": "paid"}}
+    )
+
+    order_ids = list({oid for t in transactions for oid in (t.get("order_ids") or [t["order_id"]])})
+    # Orders from before stock reservations carry no stock_state; mark the ones
+    # being paid now as owing stock so the selection below picks them up
+    await db.orders.update_many(
+        {"id": {"$in": order_ids}, "payment_status": {"$ne": "paid"}, "stock_state": {"$exists": False}},
+        {"$set": {"stock_state": RELEASED}}
+    )
+    order_result = await db.orders.update_many(
+        {"id": {"$in": order_ids}, "payment_status": {"$ne": "paid"}},
+        {"$set": {"payment_status": "paid", "status": "confirmed"}}
+    )
+
+    # Every paid order whose stock is not committed yet, not just those moved
+    # to paid above: a retry after a failure here finishes the commit
+    pending = await db.orders.find(
+        {"id": {"$in": order_ids}, "payment_status": "paid", "stock_state": {"$in": [RESERVED, RELEASED]}},
+        {"_id": 0, "id": 1, "listing_id": 1, "quantity": 1, "stock_state": 1}
+    ).to_list(len(order_ids))
+    await commit_orders(pending)
+
+    return {
+        "transactions": tx_result.modified_count,
+        "orders": order_result.modified_count,
+    }
+
+
+# ============ CONSUMER ============
+
+def _claimable(now: datetime) -> dict:
+    stale = now - timedelta(seconds=settings.STRIPE_EVENT_CLAIM_TIMEOUT_SECONDS)
+    return {"$or": [
+        {"status": "pending"},
+        # Claimed by a consumer that died mid-batch
+        {"status": "processing", "claimed_at": {"$lt": stale}},
+    ]}
+
+
+async def claim_batch(limit: int) -> tuple:
+    """Claim up to `limit` events for this consumer; returns (token, events)"""
+    db = get_db()
+    now = _now()
+    candidates = await db.stripe_events.find(
+        _claimable(now), {"_id": 0, "event_id": 1}
+    ).sort("received_at", 1).limit(limit).to_list(limit)
+    if not candidates:
+        return None, []
+
+    token = str(uuid.uuid4())
+    await db.stripe_events.update_many(
+        {"event_id": {"$in": [c["event_id"] for c in candidates]}, **_claimable(now)},
+        {"$set": {"status": "processing", "claimed_by": token, "claimed_at": now}, "$inc": {"attempts": 1}}
+    )
+    events = await db.stripe_events.find({"claimed_by": token, "status": "processing"}, {"_id": 0}).to_list(limit)
+    return token, events
+
+
+async def _apply_isolating_failures(session_ids: list) -> tuple:
+    """
+    Apply sessions as one batch, falling back to one at a time on failure
+
+    Returns (summary, {session_id: error}) so a single bad session fails
+    only the events that carry it.
+    """
+    try:
+        return await apply_paid_sessions(session_ids), {}
+    except Exception as e:
+        if len(set(session_ids)) <= 1:
+            return {}, {s: e for s in session_ids}
+
+    summary = {"transactions": 0, "orders": 0}
+    errors = {}
+    for session_id in set(session_ids):
+        try:
+            result = await apply_paid_sessions([session_id])
+        except Exception as e:
+            errors[session_id] = e
+            continue
+        for key in summary:
+            summary[key] += result[key]
+    return summary, errors
+
+
+async def _fail_events(token: str, event_ids: list, error: Exception):
+    """Hand failed events back; those out of attempts are parked as "failed" """
+    db = get_db()
+    claimed = {"claimed_by": token, "event_id": {"$in": event_ids}}
+    await db.stripe_events.update_many(
+        {**claimed, "attempts": {"$gte": settings.STRIPE_EVENT_MAX_ATTEMPTS}},
+        {"$set": {"status": "failed", "error": str(error)}}
+    )
+    await db.stripe_events.update_many(
+        {**claimed, "status": "processing"},
+        {"$set": {"status": "pending", "error": str(error)}, "$unset": {"claimed_by": ""}}
+    )
+
+
+async def process_batch(limit: int) -> int:
+    """Apply one claimed batch; returns the number of events handled"""
+    db = get_db()
+    token, events = await claim_batch(limit)
+    if not events:
+        return 0
+
+    paid = {
+        e["event_id"]: e["session_id"] for e in events
+        if e["type"] in PAID_SESSION_EVENTS and e.get("payment_status") == "paid"
+    }
+    result, errors = await _apply_isolating_failures(list(paid.values()))
+
+    failed = {}
+    for event_id, session_id in paid.items():
+        if session_id in errors:
+            failed.setdefault(session_id, []).append(event_id)
+    for session_id, event_ids in failed.items():
+        await _fail_events(token, event_ids, errors[session_id])
+    if failed:
+        logger.warning(f"⚠️ {len(failed)} paid sessions failed in a batch of {len(events)} Stripe events: "
+                       f"{next(iter(errors.values()))}")
+
+    now = _now()
+    await db.stripe_events.update_many(
+        {"claimed_by": token, "status": "processing"},
+        {"$set": {
+            "status": "done",
+            "processed_at": now,
+            "expire_at": now + timedelta(days=settings.STRIPE_EVENT_RETENTION_DAYS),
+        }}
+    )
+    applied = len(paid) - sum(len(ids) for ids in failed.values())
+    if applied:
+        logger.info(f"💳 Applied {applied} paid sessions from {len(events)} Stripe events: {result}")
+    # Stop draining after a failure; the failed events wait for the next poll
+    return 0 if failed else len(events)
+
+
+async def drain_events():
+    """Process batches until the queue is empty"""
+    while await process_batch(settings.STRIPE_EVENT_BATCH_SIZE) >= settings.STRIPE_EVENT_BATCH_SIZE:
+        pass
+
+
+_consumer: Optional[PeriodicTask] = None
+
+
+def start_stripe_event_consumer(poll_interval: float):
+    global _consumer
+    _consumer = PeriodicTask("Stripe event consumer", drain_events, poll_interval)
+    _consumer.start()
+
+
+async def stop_stripe_event_consumer():
+    if _consumer:
+        await _consumer.stop()
@@ -0,0 +1,219 @@
+"""
+NovoMarket Typeahead Suggestions
+Sorted-array prefix index over listing titles, tags and categories
+Location: backend/services/suggest_index.py
+"""
+
+import asyncio
+import heapq
+import logging
+import math
+import re
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from database import get_db
+from utils.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Most matching keys examined per query, so short prefixes stay cheap
+MAX_SCAN = 2000
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _SPACE_RE.sub(" ", text.lower()).strip()
+
+
+def listing_weight(doc: dict) -> float:
+    """Popularity of a listing: rating scaled by review volume, plus views"""
+    rating = doc.get("rating") or 0.0
+    reviews = doc.get("reviews_count") or 0
+    views = doc.get("views") or 0
+    return 1.0 + rating * math.log1p(reviews) + math.log1p(views)
+
+
+class SuggestIndex:
+    """
+    Typeahead over listing titles, tags and categories
+
+    Every suggestion (a title, tag or category, aggregated across listings)
+    is reachable from sorted keys: its full normalized text and, for titles,
+    each word-suffix ("wireless headphones" is also found by "head"). A
+    query bisects to the prefix and scans forward, never touching MongoDB.
+    """
+
+    def __init__(self):
+        self.warm = False
+        self._reset()
+        self._pending: Optional[list] = None
+        # False while bulk loading: keys are appended, then sorted once
+        self._sorted = True
+
+    def _reset(self):
+        # (kind, normalized text) -> {"text", "kind", "weight", "count", "listings"}
+        # ("listings" is tracked for titles only, to link a unique title to its listing)
+        self.entries: Dict[Tuple[str, str], dict] = {}
+        # Sorted (search_key, kind, normalized text)
+        self.keys: List[Tuple[str, str, str]] = []
+        # listing_id -> [(entry key, weight contributed)]
+        self.contributions: Dict[str, List[Tuple[Tuple[str, str], float]]] = {}
+
+    # ----- maintenance -----
+
+    def upsert(self, doc: dict):
+        """Add or refresh a listing's suggestions"""
+        if self._pending is not None:
+            self._pending.append(("upsert", doc))
+        self._upsert(doc)
+
+    def remove(self, listing_id: str):
+        """Drop a listing's suggestions"""
+        if self._pending is not None:
+            self._pending.append(("remove", listing_id))
+        self._remove(listing_id)
+
+    def _search_keys(self, kind: str, norm: str) -> List[str]:
+        if kind != "title":
+            return [norm]
+        words = norm.split(" ")
+        return [" ".join(words[i:]) for i in range(len(words))]
+
+    def _upsert(self, doc: dict):
+        listing_id = doc["id"]
+        self._remove(listing_id)
+
+        weight = listing_weight(doc)
+        labels = [("title", doc.get("title") or ""), ("category", doc.get("category") or "")]
+        labels += [("tag", tag) for tag in doc.get("tags") or [] if isinstance(tag, str)]
+
+        contributed = []
+        for kind, text in labels:
+            norm = normalize(text)
+            if not norm:
+                continue
+            key = (kind, norm)
+            if any(existing == key for existing, _ in contributed):
+                continue
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = {
+                    "text": text.strip(), "kind": kind, "weight": 0.0, "count": 0,
+                    "listings": set() if kind == "title" else None
+                }
+                self.entries[key] = entry
+                for search_key in self._search_keys(kind, norm):
+                    if self._sorted:
+                        insort(self.keys, (search_key, kind, norm))
+                    else:
+                        self.keys.append((search_key, kind, norm))
+            entry["weight"] += weight
+            entry["count"] += 1
+            if entry["listings"] is not None:
+                entry["listings"].add(listing_id)
+            contributed.append((key, weight))
+        self.contributions[listing_id] = contributed
+
+    def _remove(self, listing_id: str):
+        for key, weight in self.contributions.pop(listing_id, []):
+            entry = self.entries.get(key)
+            if entry is None:
+                continue
+            entry["weight"] -= weight
+            entry["count"] -= 1
+            if entry["listings"] is not None:
+                entry["listings"].discard(listing_id)
+            if entry["count"] <= 0:
+                del self.entries[key]
+                kind, norm = key
+                for search_key in self._search_keys(kind, norm):
+                    item = (search_key, kind, norm)
+                    i = bisect_left(self.keys, item)
+                    if i < len(self.keys) and self.keys[i] == item:
+                        del self.keys[i]
+
+    async def rebuild_from_db(self, batch_size: int = 1000):
+        """Rebuild from a MongoDB snapshot, replaying changes made meanwhile"""
+        db = get_db()
+        fresh = SuggestIndex()
+        fresh._sorted = False
+        self._pending = []
+        try:
+            cursor = db.listings.find(
+                {},
+                {"_id": 0, "id": 1, "title": 1, "tags": 1, "category": 1,
+                 "rating": 1, "reviews_count": 1, "views": 1}
+            ).batch_size(batch_size)
+            count = 0
+            async for doc in cursor:
+                fresh._upsert(doc)
+                count += 1
+                if count % batch_size == 0:
+                    await asyncio.sleep(0)
+            # Keys are only ever appended for new entries, so there are no
+            # duplicates to drop; one sort replaces an insort per key
+            fresh.keys.sort()
+
+            self.entries, self.keys, self.contributions = fresh.entries, fresh.keys, fresh.contributions
+            for op, arg in self._pending:
+                if op == "upsert":
+                    self._upsert(arg)
+                else:
+                    self._remove(arg)
+            self.warm = True
+        finally:
+            self._pending = None
+
+    # ----- querying -----
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[dict]:
+        """Top suggestions starting with `prefix`, by aggregated weight"""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        matched = set()
+        i = bisect_left(self.keys, (prefix,))
+        end = min(len(self.keys), i + MAX_SCAN)
+        while i < end and self.keys[i][0].startswith(prefix):
+            _, kind, norm = self.keys[i]
+            matched.add((kind, norm))
+            i += 1
+
+        best = heapq.nlargest(limit, (self.entries[key] for key in matched), key=lambda e: e["weight"])
+        return [
+            {
+                "text": e["text"],
+                "type": e["kind"],
+                "listing_id": next(iter(e["listings"])) if e["listings"] and len(e["listings"]) == 1 else None,
+                "score": round(e["weight"], 3),
+            }
+            for e in best
+        ]
+
+
+# Global index instance
+suggest_index = SuggestIndex()
+
+# ============ BACKGROUND REBUILD ============
+
+async def _rebuild():
+    await suggest_index.rebuild_from_db()
+    logger.info(f"💡 Suggest index rebuilt ({len(suggest_index.entries)} suggestions)")
+
+
+_rebuild_task: Optional[PeriodicTask] = None
+
+
+def start_suggest_index(rebuild_interval: int):
+    """Build the index in the background and refresh it every `rebuild_interval` seconds"""
+    global _rebuild_task
+    _rebuild_task = PeriodicTask("Suggest index rebuild", _rebuild, rebuild_interval)
+    _rebuild_task.start()
+
+
+async def stop_suggest_index():
+    if _rebuild_task:
+        await _rebuild_task.stop()
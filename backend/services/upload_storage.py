@@ -0,0 +1,270 @@
+"""
+NovoMarket Upload Storage
+Streams uploads to content-addressed files, hashing and writing off the event loop
+Location: backend/services/upload_storage.py
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import uuid
+from collections import Counter
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, UploadFile
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from config import settings
+from database import get_db
+from services.image_derivatives import derivative_pool
+from utils.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the request per step; each step is one thread hop
+CHUNK_SIZE = 1024 * 1024
+
+_EXTENSION_RE = re.compile(r"^[a-z0-9]{1,10}$")
+
+
+def upload_url(filename: str) -> str:
+    return f"{settings.UPLOAD_URL_PREFIX}{filename}"
+
+
+def file_extension(filename: Optional[str]) -> str:
+    """Lower-cased extension of the client filename, or "" when unusable"""
+    if not filename or "." not in filename:
+        return ""
+    ext = filename.rsplit(".", 1)[-1].lower()
+    return ext if _EXTENSION_RE.match(ext) else ""
+
+
+def _open_temp() -> tuple:
+    settings.UPLOAD_TMP_DIR.mkdir(exist_ok=True)
+    path = settings.UPLOAD_TMP_DIR / f"{uuid.uuid4()}.part"
+    return path, open(path, "wb")
+
+
+def _write_chunk(handle, hasher, chunk: bytes):
+    hasher.update(chunk)
+    handle.write(chunk)
+
+
+def discard_file(path: Path):
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def _place(temp_path: Path, final_path: Path) -> bool:
+    """Move a finished temp file into place; returns False if the content was already stored"""
+    if final_path.exists():
+        discard_file(temp_path)
+        return False
+    os.replace(temp_path, final_path)
+    return True
+
+
+async def store_upload(file: UploadFile, max_size: int = None) -> dict:
+    """
+    Stream an upload to disk under its SHA-256 and record a reference
+
+    By the time a route runs, Starlette has already spooled the multipart
+    body, so the size limit cannot stop the client sending it. It is checked
+    against the spooled size up front and again while chunks are copied, so
+    nothing over the limit is hashed in full or reaches UPLOAD_DIR. Chunks
+    are hashed and written in a worker thread. Identical content is stored
+    once: the `uploads` collection keeps one document per hash, whose
+    ref_count tracks the listings and messages using it (see
+    add_references); files left unused are garbage-collected.
+    """
+    max_size = max_size or settings.MAX_FILE_SIZE
+    too_large = HTTPException(
+        status_code=400,
+        detail=f"File size must be less than {max_size // (1024 * 1024)}MB"
+    )
+    if file.size is not None and file.size > max_size:
+        raise too_large
+    hasher = hashlib.sha256()
+    size = 0
+
+    temp_path, handle = await asyncio.to_thread(_open_temp)
+    try:
+        try:
+            while True:
+                chunk = await file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_size:
+                    raise too_large
+                await asyncio.to_thread(_write_chunk, handle, hasher, chunk)
+        finally:
+            await asyncio.to_thread(handle.close)
+    except BaseException:
+        await asyncio.to_thread(discard_file, temp_path)
+        raise
+
+    return await commit_file(temp_path, hasher.hexdigest(), size, file.filename, file.content_type)
+
+
+async def commit_file(
+    temp_path: Path,
+    digest: str,
+    size: int,
+    filename: Optional[str],
+    content_type: Optional[str]
+) -> dict:
+    """Record a finished temp file and move it to its content address"""
+    ext = file_extension(filename)
+    try:
+        record = await record_upload(digest, f"{digest}.{ext}" if ext else digest, size, content_type)
+    except BaseException:
+        await asyncio.to_thread(discard_file, temp_path)
+        raise
+
+    # The first upload of this content names the file; later ones reuse it
+    final_path = settings.UPLOAD_DIR / record["filename"]
+    stored = await asyncio.to_thread(_place, temp_path, final_path)
+    if stored:
+        derivative_pool.enqueue(final_path, digest)
+    return {
+        "sha256": digest,
+        "filename": record["filename"],
+        "size": size,
+        "deduplicated": not stored,
+    }
+
+
+async def record_upload(digest: str, filename: str, size: int, content_type: Optional[str]) -> dict:
+    """Create the record for `digest` on first sight; uploading adds no reference"""
+    db = get_db()
+    now = datetime.now(timezone.utc)
+    update = {
+        # Restarts the grace period, so the collector leaves a fresh upload
+        # alone until a listing or message has had time to use it
+        "$set": {"referenced_at": now},
+        "$setOnInsert": {
+            "filename": filename,
+            "size": size,
+            "content_type": content_type,
+            "ref_count": 0,
+            "usage_counted": True,
+            "timestamp": now.isoformat(),
+        },
+    }
+    try:
+        return await db.uploads.find_one_and_update(
+            {"hash": digest}, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # A concurrent upload of the same content inserted it first
+        return await db.uploads.find_one_and_update(
+            {"hash": digest}, update, return_document=ReturnDocument.AFTER
+        )
+
+
+# ============ REFERENCES ============
+
+def image_changes(before: Optional[list], after: Optional[list]) -> tuple:
+    """(added, dropped) URLs between two image lists, counting repeats"""
+    before, after = Counter(before or []), Counter(after or [])
+    return list((after - before).elements()), list((before - after).elements())
+
+
+def _digests(urls: Iterable[Optional[str]]) -> Counter:
+    prefix = settings.UPLOAD_URL_PREFIX
+    return Counter(
+        url[len(prefix):].partition(".")[0] for url in urls
+        if isinstance(url, str) and url.startswith(prefix)
+    )
+
+
+async def _adjust_references(urls: Iterable[Optional[str]], step: int) -> int:
+    digests = _digests(urls)
+    if not digests:
+        return 0
+    now = datetime.now(timezone.utc)
+    if step > 0:
+        ops = [
+            UpdateOne({"hash": digest}, {"$inc": {"ref_count": count}, "$set": {"referenced_at": now}})
+            for digest, count in digests.items()
+        ]
+    else:
+        # One op per reference, so a count can never be taken below zero
+        ops = [
+            UpdateOne({"hash": digest, "ref_count": {"$gt": 0}}, {"$inc": {"ref_count": -1}, "$set": {"referenced_at": now}})
+            for digest, count in digests.items() for _ in range(count)
+        ]
+    result = await get_db().uploads.bulk_write(ops, ordered=False)
+    return result.modified_count
+
+
+async def add_references(urls: Iterable[Optional[str]]) -> int:
+    """
+    Count one use of each content-addressed upload URL in `urls`
+
+    ref_count is the number of listing image slots and chat messages using
+    the file. Call this when a listing gains images or a message carries a
+    file; other URLs are ignored.
+    """
+    return await _adjust_references(urls, 1)
+
+
+async def release_references(urls: Iterable[Optional[str]]) -> int:
+    """Give back one use per content-addressed URL; counts never go below zero"""
+    return await _adjust_references(urls, -1)
+
+
+# ============ GARBAGE COLLECTION ============
+
+def _delete_files(names: list):
+    for name in names:
+        discard_file(settings.UPLOAD_DIR / name)
+
+
+async def collect_unreferenced_uploads(limit: int = 500) -> int:
+    """
+    Delete stored files nothing has used for UPLOAD_GC_GRACE_SECONDS
+
+    Only records created since usage counting began (`usage_counted`) are
+    considered; older ones counted uploads rather than uses. The record is
+    deleted first, conditionally, so a file picked up again meanwhile is
+    kept; its derivatives go with it.
+    """
+    db = get_db()
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.UPLOAD_GC_GRACE_SECONDS)
+    unreferenced = {"usage_counted": True, "ref_count": {"$lte": 0}, "referenced_at": {"$lt": cutoff}}
+    candidates = await db.uploads.find(
+        unreferenced, {"_id": 0, "hash": 1, "filename": 1, "derivatives": 1}
+    ).limit(limit).to_list(limit)
+
+    collected = 0
+    for upload in candidates:
+        result = await db.uploads.delete_one({"hash": upload["hash"], **unreferenced})
+        if result.deleted_count:
+            await asyncio.to_thread(_delete_files, [upload["filename"]] + (upload.get("derivatives") or []))
+            collected += 1
+    if collected:
+        logger.info(f"🧹 Deleted {collected} unreferenced uploads")
+    return collected
+
+
+_collector: Optional[PeriodicTask] = None
+
+
+def start_upload_collector(interval: float):
+    global _collector
+    _collector = PeriodicTask("Unreferenced upload cleanup", collect_unreferenced_uploads, interval)
+    _collector.start()
+
+
+async def stop_upload_collector():
+    if _collector:
+        await _collector.stop()
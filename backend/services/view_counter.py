@@ -0,0 +1,150 @@
+"""
+NovoMarket Listing View Counters
+Buffers per-listing view and impression counts in memory and flushes them as bulk $inc
+Location: backend/services/view_counter.py
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from pymongo import UpdateOne
+
+from config import settings
+from database import get_db
+from utils.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounterBuffer:
+    """
+    In-process counter buffer for listing views and impressions
+
+    Recording is a dict update with no I/O; a background task flushes the
+    buffer as one unordered bulk_write of $inc operations. The buffer holds at
+    most `max_pending` counts: reaching it triggers an early flush, and counts
+    arriving while that flush is still running are dropped. A crash therefore
+    loses at most `max_pending` buffered counts plus the batch in flight.
+    """
+
+    def __init__(self, max_pending: int):
+        self.max_pending = max_pending
+        # listing_id -> {"views": n, "impressions": n}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._pending = 0
+        self._flush_lock = asyncio.Lock()
+        self._early_flush: Optional[asyncio.Task] = None
+        self._inflight: Optional[asyncio.Future] = None
+        self.flushed = 0
+        self.dropped = 0
+
+    # ----- recording -----
+
+    def record_view(self, listing_id: str):
+        self._record(listing_id, "views", 1)
+
+    def record_impressions(self, listing_ids):
+        for listing_id in listing_ids:
+            self._record(listing_id, "impressions", 1)
+
+    def _record(self, listing_id: str, field: str, amount: int):
+        if self._pending >= self.max_pending:
+            self._schedule_flush()
+            if self._pending >= self.max_pending:
+                self.dropped += amount
+                return
+        counts = self._counts.get(listing_id)
+        if counts is None:
+            counts = self._counts[listing_id] = {}
+        counts[field] = counts.get(field, 0) + amount
+        self._pending += amount
+        if self._pending >= self.max_pending:
+            self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._early_flush is not None and not self._early_flush.done():
+            return
+        try:
+            self._early_flush = asyncio.get_running_loop().create_task(self.flush())
+        except RuntimeError:
+            # No running loop (e.g. called from a worker thread); the periodic flush will catch up
+            pass
+
+    # ----- flushing -----
+
+    async def flush(self) -> int:
+        """Write buffered counts to MongoDB; returns the number of counts flushed"""
+        async with self._flush_lock:
+            if self._inflight is not None:
+                # A write orphaned by a cancelled flush; let it land first
+                await asyncio.wait([self._inflight])
+            if not self._counts:
+                return 0
+            batch, pending = self._counts, self._pending
+            self._counts, self._pending = {}, 0
+
+            ops = [UpdateOne({"id": listing_id}, {"$inc": counts}) for listing_id, counts in batch.items()]
+            # The write runs as its own task and settles the batch when it
+            # ends, so cancelling the flush (e.g. on shutdown) neither loses
+            # the counts nor writes them twice
+            write = asyncio.ensure_future(get_db().listings.bulk_write(ops, ordered=False))
+            write.add_done_callback(lambda task: self._settle(task, batch, pending))
+            self._inflight = write
+            await asyncio.wait([write])
+            return 0 if write.cancelled() or write.exception() else pending
+
+    def _settle(self, write: asyncio.Future, batch: Dict[str, Dict[str, int]], pending: int):
+        if self._inflight is write:
+            self._inflight = None
+        error = "cancelled" if write.cancelled() else write.exception()
+        if error:
+            self._restore(batch)
+            logger.warning(f"⚠️ View counter flush failed, {pending} counts kept for retry: {error}")
+        else:
+            self.flushed += pending
+
+    def _restore(self, batch: Dict[str, Dict[str, int]]):
+        """Merge a failed batch back, dropping whatever exceeds the buffer bound"""
+        for listing_id, counts in batch.items():
+            for field, amount in counts.items():
+                room = self.max_pending - self._pending
+                if room <= 0:
+                    self.dropped += amount
+                    continue
+                kept = min(amount, room)
+                self.dropped += amount - kept
+                current = self._counts.setdefault(listing_id, {})
+                current[field] = current.get(field, 0) + kept
+                self._pending += kept
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._pending,
+            "listings": len(self._counts),
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+        }
+
+
+# ============ GLOBAL BUFFER ============
+
+view_counter = ViewCounterBuffer(settings.VIEW_COUNTER_MAX_PENDING)
+
+_flush_task: Optional[PeriodicTask] = None
+
+
+def start_view_counter(flush_interval: float):
+    """Flush the buffer every `flush_interval` seconds"""
+    global _flush_task
+    _flush_task = PeriodicTask("View counter flush", view_counter.flush, flush_interval, run_immediately=False)
+    _flush_task.start()
+
+
+async def stop_view_counter():
+    """Stop the periodic flush and write out whatever is still buffered"""
+    if _flush_task:
+        await _flush_task.stop()
+    flushed = await view_counter.flush()
+    if flushed:
+        logger.info(f"👀 Flushed {flushed} buffered view counts")
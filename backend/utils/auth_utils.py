@@ -3,24 +3,40 @@
 Authentication utilities: JWT tokens, password hashing, user validation
 """
 from fastapi import HTTPException, Header
-from passlib.context import CryptContext
 from datetime import datetime, timezone, timedelta
 import jwt
 from config import settings
 from database import get_db
 from models import User
+from utils.cache import TTLCache
+from utils.password_hashing import PasswordHasher, build_context
+from utils.token_versions import TokenVersionRegistry
 
 # Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_context(settings.BCRYPT_ROUNDS)
+
+# Process pool for hashing inside request handlers
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    max_workers=settings.PASSWORD_HASH_WORKERS
+)
 
 def hash_password(password: str) -> str:
-    """Hash a password"""
+    """Hash a password (blocking - use hash_password_async in async handlers)"""
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hash"""
+    """Verify password against hash (blocking - use verify_password_async in async handlers)"""
     return pwd_context.verify(plain_password, hashed_password)
 
+async def hash_password_async(password: str) -> str:
+    """Hash a password without blocking the event loop"""
+    return await password_hasher.hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password against hash without blocking the event loop"""
+    return await password_hasher.verify(plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -33,6 +49,25 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
+def token_claims(user: dict) -> dict:
+    """
+    Build the JWT payload for a user document
+
+    With JWT_STATELESS_CLAIMS enabled the token also carries the fields routes
+    read from current_user (name, role, verified) plus the user's token
+    version, so get_current_user can skip the database. Changing any of those
+    fields requires revoke_user_tokens() so old tokens stop being accepted.
+    """
+    claims = {"user_id": user["id"], "email": user["email"]}
+    if settings.JWT_STATELESS_CLAIMS:
+        claims.update({
+            "name": user.get("name"),
+            "role": user.get("role", "buyer"),
+            "verified": user.get("verified", False),
+            "tv": user.get("token_version", 0),
+        })
+    return claims
+
 def decode_token(token: str) -> dict:
     """Decode JWT token"""
     try:
@@ -43,6 +78,69 @@ def decode_token(token: str) -> dict:
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+# ============ USER CACHE ============
+
+# Authenticated users keyed by user_id; saves a Mongo round trip per request
+user_cache = TTLCache(
+    "users",
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS
+)
+
+def invalidate_user(user_id: str):
+    """
+    Drop a user from the auth cache
+
+    Call this after any write to the user's document. Other worker processes
+    pick the change up once their own entry expires (USER_CACHE_TTL_SECONDS).
+    """
+    user_cache.invalidate(user_id)
+
+async def _load_user(user_id: str) -> tuple:
+    """(User, token_version) for a user, served from the in-process cache when possible"""
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    
+    db = get_db()
+    user_doc = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
+    
+    if not user_doc:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # Convert timestamp to created_at if needed
+    if isinstance(user_doc.get('timestamp'), str):
+        user_doc['created_at'] = datetime.fromisoformat(user_doc.pop('timestamp'))
+    
+    cached = (User(**user_doc), user_doc.get("token_version", 0))
+    user_cache.set(user_id, cached)
+    return cached
+
+async def get_user_by_id(user_id: str) -> User:
+    """Load a user by id, served from the in-process cache when possible"""
+    user, _ = await _load_user(user_id)
+    return user
+
+# ============ STATELESS TOKENS ============
+
+token_versions = TokenVersionRegistry(refresh_interval=settings.TOKEN_VERSION_REFRESH_SECONDS)
+
+async def revoke_user_tokens(user_id: str) -> int:
+    """Invalidate every token issued to a user so far"""
+    version = await token_versions.bump(user_id)
+    invalidate_user(user_id)
+    return version
+
+def user_from_claims(payload: dict) -> User:
+    """Build a User from signed stateless claims without touching the database"""
+    return User.model_construct(
+        id=payload["user_id"],
+        email=payload["email"],
+        name=payload["name"],
+        role=payload["role"],
+        verified=payload.get("verified", False)
+    )
+
 async def get_current_user(authorization: str = Header(None)) -> User:
     """
     Get current authenticated user from JWT token
@@ -60,17 +158,18 @@ async def get_current_user(authorization: str = Header(None)) -> User:
     if not user_id:
         raise HTTPException(status_code=401, detail="Invalid token payload")
     
-    db = get_db()
-    user_doc = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
-    
-    if not user_doc:
-        raise HTTPException(status_code=404, detail="User not found")
-    
-    # Convert timestamp to created_at if needed
-    if isinstance(user_doc.get('timestamp'), str):
-        user_doc['created_at'] = datetime.fromisoformat(user_doc.pop('timestamp'))
+    # Stateless tokens authenticate from claims once the version map is loaded
+    if "tv" in payload and settings.JWT_STATELESS_CLAIMS and token_versions.warm:
+        if payload["tv"] < token_versions.get(user_id):
+            raise HTTPException(status_code=401, detail="Token revoked")
+        return user_from_claims(payload)
     
-    return User(**user_doc)
+    # Every other token is checked against the stored version too: tokens
+    # without "tv" predate versioning and count as version 0
+    user, version = await _load_user(user_id)
+    if payload.get("tv", 0) < max(version, token_versions.get(user_id)):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return user
 
 def require_role(allowed_roles: list):
     """
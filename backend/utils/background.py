@@ -0,0 +1,58 @@
+# backend/utils/background.py
+"""
+Background task helpers for periodic in-process jobs
+"""
+from typing import Awaitable, Callable, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Runs an async job every `interval` seconds until stopped
+
+    Errors are logged and the loop keeps going. With `run_immediately` the
+    first run starts right away; an interval <= 0 runs the job only once.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        job: Callable[[], Awaitable[None]],
+        interval: float,
+        run_immediately: bool = True
+    ):
+        self.name = name
+        self.job = job
+        self.interval = interval
+        self.run_immediately = run_immediately
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        if not self.run_immediately:
+            await asyncio.sleep(self.interval)
+        while True:
+            try:
+                await self.job()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ {self.name} failed: {e}")
+            if self.interval <= 0:
+                return
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
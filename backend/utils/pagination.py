@@ -0,0 +1,62 @@
+# backend/utils/pagination.py
+"""
+Keyset (cursor) pagination helpers
+
+A cursor is an opaque, URL-safe token holding the sort-key values of the
+last item on the previous page. The next page is fetched with a range
+filter on those keys instead of skip(), so every page costs the same.
+"""
+from fastapi import HTTPException
+from typing import List, Tuple
+import base64
+import json
+
+# (field, direction) pairs; direction is 1 (ascending) or -1 (descending)
+SortSpec = List[Tuple[str, int]]
+
+# Cursor values go straight into query clauses, so only plain scalars are
+# accepted: a dict such as {"$ne": null} would run as a Mongo operator
+_SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def encode_cursor(values: dict) -> str:
+    """Encode sort-key values as an opaque cursor token"""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decode a cursor token, rejecting anything malformed with a 400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, dict) or not all(isinstance(v, _SCALAR_TYPES) for v in values.values()):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def cursor_for(doc: dict, sort: SortSpec) -> str:
+    """Cursor pointing just past `doc` in the given sort order"""
+    return encode_cursor({field: doc.get(field) for field, _ in sort})
+
+
+def keyset_filter(sort: SortSpec, values: dict) -> dict:
+    """
+    Mongo filter matching documents strictly after `values` in `sort` order
+
+    For sort [(a, -1), (b, 1)] this is: a < va OR (a == va AND b > vb).
+    The last sort field must be unique (e.g. `id`) for stable paging.
+    """
+    if set(values) != {field for field, _ in sort}:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+    if not all(isinstance(v, _SCALAR_TYPES) for v in values.values()):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {prev: values[prev] for prev, _ in sort[:i]}
+        clause[field] = {"$lt" if direction < 0 else "$gt": values[field]}
+        clauses.append(clause)
+    return {"$or": clauses}
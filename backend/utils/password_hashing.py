@@ -0,0 +1,86 @@
+# backend/utils/password_hashing.py
+"""
+Password hashing off the event loop
+
+bcrypt is deliberately slow (tens of milliseconds per call), so running it
+inline in an async handler stalls every other coroutine. PasswordHasher runs
+hash/verify in a bounded process pool instead. This module only depends on
+passlib so spawned workers start quickly and never open DB connections.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import asyncio
+import multiprocessing
+import logging
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+# Context used inside each worker process (set by _init_worker)
+_worker_context: Optional[CryptContext] = None
+
+
+def build_context(rounds: int) -> CryptContext:
+    """bcrypt CryptContext with the given cost factor"""
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def _init_worker(rounds: int):
+    global _worker_context
+    _worker_context = build_context(rounds)
+
+
+def _hash(password: str) -> str:
+    return _worker_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return _worker_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs bcrypt hash/verify in a bounded process pool"""
+
+    def __init__(self, rounds: int = 12, max_workers: int = 2, max_pending: Optional[int] = None):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        # Cap on jobs handed to the pool at once; extra callers wait their turn
+        self.max_pending = max_pending or max_workers * 2
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.rounds,)
+            )
+            logger.info(f"✅ Password hashing pool started ({self.max_workers} workers, cost {self.rounds})")
+        return self._executor
+
+    async def _run(self, fn, *args):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password in the worker pool"""
+        return await self._run(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password against its hash in the worker pool"""
+        if not hashed_password:
+            return False
+        return await self._run(_verify, plain_password, hashed_password)
+
+    def shutdown(self):
+        """Stop worker processes (call on application shutdown)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("✅ Password hashing pool stopped")
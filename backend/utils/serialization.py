@@ -0,0 +1,97 @@
+# backend/utils/serialization.py
+"""
+Fast JSON serialization for documents read from our own database
+
+Documents in our collections were validated by pydantic when they were
+written, so re-validating them on every read (fromisoformat, Model(**doc),
+then FastAPI's response_model pass) is pure overhead on list endpoints.
+trusted_json_response projects each document onto the model's fields,
+fills defaults for missing ones and serializes straight to JSON bytes.
+
+Stored `timestamp` strings are emitted as-is in `created_at`, so offsets
+appear as "+00:00" rather than pydantic's "Z"; both are valid ISO 8601.
+"""
+from fastapi import Response
+from pydantic import BaseModel
+from datetime import datetime, date
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+import json
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+_REQUIRED = object()
+_FACTORY = object()
+
+# Per-model [(field_name, kind, default)] computed once
+_field_specs: Dict[Type[BaseModel], List[Tuple[str, Any, Any]]] = {}
+
+
+def _field_spec(model: Type[BaseModel]) -> List[Tuple[str, Any, Any]]:
+    spec = _field_specs.get(model)
+    if spec is None:
+        spec = []
+        for name, field in model.model_fields.items():
+            if field.is_required():
+                spec.append((name, _REQUIRED, None))
+            elif field.default_factory is not None:
+                spec.append((name, _FACTORY, field.default_factory))
+            else:
+                spec.append((name, None, field.default))
+        _field_specs[model] = spec
+    return spec
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize to compact JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default)
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+
+def trusted_dump(doc: dict, model: Type[BaseModel], defaults: Optional[dict] = None) -> Optional[dict]:
+    """
+    Project a stored document onto `model`'s fields without validation
+
+    Stored `timestamp` becomes `created_at`. `defaults` patches fields that
+    legacy documents may lack. Returns None when a required field is still
+    missing so callers can skip the document, as validation would have.
+    """
+    out = {}
+    for name, kind, default in _field_spec(model):
+        if name in doc:
+            out[name] = doc[name]
+        elif name == "created_at" and "timestamp" in doc:
+            out[name] = doc["timestamp"]
+        elif defaults and name in defaults:
+            out[name] = defaults[name]
+        elif kind is _REQUIRED:
+            return None
+        elif kind is _FACTORY:
+            out[name] = default()
+        else:
+            out[name] = default
+    return out
+
+
+def trusted_json_response(
+    docs: Iterable[dict],
+    model: Type[BaseModel],
+    defaults: Optional[dict] = None,
+    headers: Optional[dict] = None
+) -> Response:
+    """JSON array response of trusted documents shaped like `model`"""
+    items = []
+    for doc in docs:
+        item = trusted_dump(doc, model, defaults)
+        if item is not None:
+            items.append(item)
+    return Response(content=dumps(items), media_type="application/json", headers=headers)
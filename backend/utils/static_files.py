@@ -0,0 +1,268 @@
+# backend/utils/static_files.py
+"""
+Static serving for /uploads
+
+Content-addressed files (<sha256>.<ext> and their <sha256>_w<width>.webp /
+<sha256>_full.webp derivatives) never change, so they get a strong ETag
+derived from the name and `Cache-Control: immutable`; browsers keep them for
+a year without revalidating. Conditional requests are answered with 304 without
+opening the file, and single byte ranges with 206. Bodies go out through the
+ASGI zero-copy (sendfile) or pathsend extensions when the server offers
+them; otherwise small files are read in one worker-thread hop and large
+ones in 256KB chunks.
+
+A missing derivative falls back to the original image, so derivative URLs
+work before generation finishes and for images smaller than the width.
+"""
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, Tuple
+import mimetypes
+import os
+import re
+import stat
+
+import anyio
+
+from utils.cache import TTLCache
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Legacy uuid-named uploads are never rewritten either, but carry no content hash
+MUTABLE_CACHE_CONTROL = "public, max-age=86400"
+# A derivative served by its original may be replaced once generated
+FALLBACK_CACHE_CONTROL = "public, max-age=300"
+
+CHUNK_SIZE = 256 * 1024
+
+_CONTENT_ADDRESSED_RE = re.compile(r"^(?P<hash>[0-9a-f]{64})(?P<variant>_w\d+|_full)?(?:\.(?P<ext>[a-z0-9]{1,10}))?$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Original extensions tried when a derivative is missing
+ORIGINAL_EXTENSIONS = ("jpg", "jpeg", "png", "webp", "gif", "bmp", "tiff")
+
+
+class UploadFiles:
+    """ASGI app serving one flat directory of uploaded files"""
+
+    def __init__(self, directory: Path, stat_cache_size: int = 20000, stat_cache_ttl: int = 60,
+                 negative_ttl: float = 5.0):
+        self.directory = Path(directory)
+        # name -> (size, mtime), or False for a missing file (kept `negative_ttl`
+        # seconds, so a file written meanwhile shows up quickly)
+        self.stat_cache = TTLCache("upload_stats", stat_cache_size, stat_cache_ttl)
+        self.negative_ttl = negative_ttl
+
+    # ----- lookup -----
+
+    def _stat(self, name: str) -> Optional[Tuple[int, float]]:
+        cached = self.stat_cache.get(name)
+        if cached is not None:
+            return cached or None
+        try:
+            st = os.stat(self.directory / name)
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            self.stat_cache.set(name, False, ttl=self.negative_ttl)
+            return None
+        result = (st.st_size, st.st_mtime)
+        self.stat_cache.set(name, result)
+        return result
+
+    def _resolve(self, name: str) -> Optional[Tuple[str, int, float, str, str]]:
+        """(served name, size, mtime, etag, cache-control) or None"""
+        found = self._stat(name)
+        match = _CONTENT_ADDRESSED_RE.match(name)
+        if found is not None:
+            size, mtime = found
+            if match:
+                return name, size, mtime, f'"{match.group("hash")}{match.group("variant") or ""}"', IMMUTABLE_CACHE_CONTROL
+            return name, size, mtime, f'"{int(mtime)}-{size}"', MUTABLE_CACHE_CONTROL
+
+        # Missing derivative: serve the original image instead
+        if match and match.group("variant") and match.group("ext") == "webp":
+            digest = match.group("hash")
+            for ext in ORIGINAL_EXTENSIONS:
+                original = f"{digest}.{ext}"
+                found = self._stat(original)
+                if found is not None:
+                    size, mtime = found
+                    return original, size, mtime, f'"{digest}"', FALLBACK_CACHE_CONTROL
+        return None
+
+    # ----- ASGI -----
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            await _send_empty(send, 405, [(b"allow", b"GET, HEAD")])
+            return
+
+        name = _route_path(scope).lstrip("/")
+        if not name or "/" in name or "\\" in name or "\x00" in name or name.startswith("."):
+            await _send_empty(send, 404)
+            return
+
+        if self.stat_cache.get(name) is not None:
+            resolved = self._resolve(name)
+        else:
+            # Not cached yet: stat in a worker thread, off the event loop
+            resolved = await anyio.to_thread.run_sync(self._resolve, name)
+        if resolved is None:
+            await _send_empty(send, 404)
+            return
+        served, size, mtime, etag, cache_control = resolved
+
+        request_headers = _headers(scope)
+        headers = [
+            (b"etag", etag.encode()),
+            (b"last-modified", formatdate(mtime, usegmt=True).encode()),
+            (b"cache-control", cache_control.encode()),
+            (b"accept-ranges", b"bytes"),
+        ]
+
+        if _not_modified(request_headers, etag, mtime):
+            await _send_empty(send, 304, headers)
+            return
+
+        media_type = mimetypes.guess_type(served)[0] or "application/octet-stream"
+        headers += [(b"content-type", media_type.encode()), (b"x-content-type-options", b"nosniff")]
+
+        start, end = 0, size - 1
+        status = 200
+        byte_range = request_headers.get(b"range")
+        if byte_range is not None and _if_range_matches(request_headers.get(b"if-range"), etag, mtime):
+            parsed = _parse_range(byte_range.decode("latin-1"), size)
+            if parsed is False:
+                await _send_empty(send, 416, headers + [(b"content-range", f"bytes */{size}".encode())])
+                return
+            if parsed is not None:
+                start, end = parsed
+                status = 206
+                headers.append((b"content-range", f"bytes {start}-{end}/{size}".encode()))
+
+        count = end - start + 1 if size else 0
+        headers.append((b"content-length", str(count).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        if method == "HEAD" or count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        await self._send_file(scope, send, self.directory / served, start, count, size)
+
+    async def _send_file(self, scope, send, path: Path, offset: int, count: int, size: int):
+        extensions = scope.get("extensions") or {}
+        if "http.response.zerocopysend" in extensions:
+            with open(path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": offset,
+                    "count": count,
+                    "more_body": False,
+                })
+            return
+        if "http.response.pathsend" in extensions and offset == 0 and count == size:
+            await send({"type": "http.response.pathsend", "path": str(path)})
+            return
+
+        if count <= CHUNK_SIZE:
+            body = await anyio.to_thread.run_sync(_read_range, path, offset, count)
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+
+        async with await anyio.open_file(path, "rb") as f:
+            if offset:
+                await f.seek(offset)
+            remaining = count
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank underneath us; end the response
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+# ============ HELPERS ============
+
+def _read_range(path: Path, offset: int, count: int) -> bytes:
+    with open(path, "rb") as f:
+        if offset:
+            f.seek(offset)
+        return f.read(count)
+
+
+def _route_path(scope) -> str:
+    """Path below the mount point (Mount puts the prefix in root_path)"""
+    path, root_path = scope["path"], scope.get("root_path", "")
+    if root_path and path.startswith(root_path):
+        return path[len(root_path):]
+    return path
+
+
+def _headers(scope) -> dict:
+    return {k.lower(): v for k, v in scope["headers"]}
+
+
+async def _send_empty(send, status: int, headers: list = None):
+    headers = list(headers or [])
+    # A 304 must not describe a body length of its own (RFC 9110 8.6)
+    if status != 304:
+        headers.append((b"content-length", b"0"))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _not_modified(request_headers: dict, etag: str, mtime: float) -> bool:
+    if_none_match = request_headers.get(b"if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip() for t in if_none_match.decode("latin-1").split(",")]
+        # Weak comparison, as RFC 9110 requires for If-None-Match
+        return "*" in tags or etag in [t[2:] if t.startswith("W/") else t for t in tags]
+    if_modified_since = request_headers.get(b"if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since.decode("latin-1")).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _if_range_matches(if_range: Optional[bytes], etag: str, mtime: float) -> bool:
+    """A Range applies only if If-Range is absent or still current"""
+    if if_range is None:
+        return True
+    value = if_range.decode("latin-1").strip()
+    if value.startswith('"'):
+        return value == etag
+    try:
+        return int(mtime) <= parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def _parse_range(header: str, size: int):
+    """(start, end) for one satisfiable range, None to ignore, False if unsatisfiable"""
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        # Multiple or malformed ranges: serve the whole file
+        return None
+    first, last = match.groups()
+    if first == "" and last == "":
+        return None
+    if first == "":
+        suffix = int(last)
+        if suffix == 0:
+            return False
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    if start >= size:
+        return False
+    end = min(int(last), size - 1) if last else size - 1
+    if end < start:
+        return None
+    return start, end
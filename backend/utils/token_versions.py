@@ -0,0 +1,84 @@
+# backend/utils/token_versions.py
+"""
+Per-user token versions for revoking stateless JWTs
+
+Each user document may carry an integer `token_version` (absent means 0).
+Stateless tokens embed the version they were issued with; bumping the
+counter revokes every token issued before. Only users that have ever
+revoked have a non-zero version, so the whole map is small enough to keep
+in memory and refresh in the background with a single query.
+"""
+from typing import Dict, Optional
+from pymongo import ReturnDocument
+import asyncio
+import logging
+
+from database import get_db
+
+logger = logging.getLogger(__name__)
+
+
+class TokenVersionRegistry:
+    """In-memory map of user_id -> token_version, refreshed periodically"""
+
+    def __init__(self, refresh_interval: float = 30.0):
+        self.refresh_interval = refresh_interval
+        self.versions: Dict[str, int] = {}
+        self.warm = False
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, user_id: str) -> int:
+        """Current token version for a user"""
+        return self.versions.get(user_id, 0)
+
+    async def refresh(self):
+        """Reload all non-zero versions from MongoDB"""
+        db = get_db()
+        docs = await db.users.find(
+            {"token_version": {"$gt": 0}},
+            {"_id": 0, "id": 1, "token_version": 1}
+        ).to_list(None)
+        versions = {d["id"]: d["token_version"] for d in docs}
+        # Versions only ever go up, so keep the higher of the two: a bump
+        # made while the query ran is newer than the snapshot it returned
+        for user_id, version in self.versions.items():
+            if version > versions.get(user_id, 0):
+                versions[user_id] = version
+        self.versions = versions
+        self.warm = True
+
+    async def bump(self, user_id: str) -> int:
+        """Increment a user's version, revoking all previously issued tokens"""
+        db = get_db()
+        doc = await db.users.find_one_and_update(
+            {"id": user_id},
+            {"$inc": {"token_version": 1}},
+            projection={"_id": 0, "token_version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        version = doc["token_version"] if doc else 0
+        self.versions[user_id] = version
+        return version
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ Token version refresh failed: {e}")
+
+    async def start(self):
+        """Load versions once, then keep refreshing in the background"""
+        await self.refresh()
+        self._task = asyncio.create_task(self._refresh_loop())
+        logger.info(f"✅ Token version registry loaded ({len(self.versions)} revoked users)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
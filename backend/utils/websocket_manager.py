@@ -1,25 +1,67 @@
 # backend/utils/websocket_manager.py
 """
 WebSocket connection manager for real-time chat and notifications
+
+Every message is serialized once and handed to each connection's bounded
+send queue; a writer task per connection drains its queue. Sending never
+awaits a client, so one slow socket cannot delay anyone else. A connection
+whose queue reaches the high-water mark, or whose current send has been
+stalled past the timeout, is closed (1013 "try again later") and the
+client reconnects. One watchdog task checks every in-progress send twice per
+timeout, so a socket that stalls while nothing else is being sent is dropped
+too, without arming a timer for every frame.
 """
 from fastapi import WebSocket
-from typing import Dict, List
-import json
+from typing import Dict, List, Optional
+import asyncio
 import logging
 
+from config import settings
+from utils.serialization import dumps
+
 logger = logging.getLogger(__name__)
 
+# Close code for slow consumers: "Try Again Later"
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class _Connection:
+    """One socket, its send queue and the writer task draining it"""
+
+    def __init__(self, websocket: WebSocket, user_id: str, queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+        # Loop time the in-progress send started, None while idle
+        self.sending_since: Optional[float] = None
+
+
 class ConnectionManager:
     """Manages WebSocket connections for real-time communication"""
     
-    def __init__(self):
+    def __init__(self, queue_size: int = 256, send_timeout: float = 10.0):
         # Maps user_id to list of WebSocket connections
         self.active_connections: Dict[str, List[WebSocket]] = {}
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self._connections: Dict[WebSocket, _Connection] = {}
+        self._evictions: set = set()
+        self._watchdog: Optional[asyncio.Task] = None
+        self.frames_sent = 0
+        self.slow_consumers_dropped = 0
     
     async def connect(self, websocket: WebSocket, user_id: str):
         """Accept and store a new WebSocket connection"""
         await websocket.accept()
         
+        conn = _Connection(websocket, user_id, self.queue_size)
+        conn.writer = asyncio.create_task(self._write(conn))
+        self._connections[websocket] = conn
+        if self._watchdog is None or self._watchdog.done():
+            self._watchdog = asyncio.create_task(self._watch_stalls())
+        
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
         
@@ -30,7 +72,14 @@ class ConnectionManager:
         await self.broadcast_online_users()
     
     async def disconnect(self, websocket: WebSocket, user_id: str):
-        """Remove a WebSocket connection"""
+        """Remove a WebSocket connection (safe to call more than once)"""
+        conn = self._connections.pop(websocket, None)
+        if conn is None:
+            return
+        conn.closed = True
+        if conn.writer is not None and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
+        
         if user_id in self.active_connections:
             try:
                 self.active_connections[user_id].remove(websocket)
@@ -45,37 +94,88 @@ class ConnectionManager:
         # Broadcast updated online users
         await self.broadcast_online_users()
     
+    # ============ SENDING ============
+    
+    def _enqueue(self, conn: _Connection, frame: str):
+        if conn.closed:
+            return
+        if not self._stalled(conn, asyncio.get_running_loop().time()):
+            try:
+                conn.queue.put_nowait(frame)
+                return
+            except asyncio.QueueFull:
+                pass
+        self._drop_slow(conn, f"{conn.queue.qsize()} frames queued")
+    
+    async def _write(self, conn: _Connection):
+        """Writer task: drain one connection's queue in order"""
+        loop = asyncio.get_running_loop()
+        try:
+            # `closed` is checked as well as relying on cancel, so the loop
+            # always ends once the connection is dropped
+            while not conn.closed:
+                frame = await conn.queue.get()
+                conn.sending_since = loop.time()
+                await conn.websocket.send_text(frame)
+                conn.sending_since = None
+                self.frames_sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to send to {conn.user_id}: {e!r}")
+            conn.closed = True
+            await self._evict(conn)
+    
+    def _stalled(self, conn: _Connection, now: float) -> bool:
+        return conn.sending_since is not None and now - conn.sending_since > self.send_timeout
+    
+    async def _watch_stalls(self):
+        """Drop connections whose current send has run past the timeout"""
+        loop = asyncio.get_running_loop()
+        while self._connections:
+            await asyncio.sleep(self.send_timeout / 2)
+            now = loop.time()
+            for conn in list(self._connections.values()):
+                if not conn.closed and self._stalled(conn, now):
+                    self._drop_slow(conn, f"send stalled over {self.send_timeout}s")
+    
+    def _drop_slow(self, conn: _Connection, reason: str):
+        self.slow_consumers_dropped += 1
+        logger.warning(f"⚠️ Dropping slow WebSocket consumer {conn.user_id} ({reason})")
+        conn.closed = True
+        task = asyncio.create_task(self._evict(conn))
+        self._evictions.add(task)
+        task.add_done_callback(self._evictions.discard)
+    
+    async def _evict(self, conn: _Connection):
+        try:
+            await conn.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+        await self.disconnect(conn.websocket, conn.user_id)
+    
+    async def send(self, websocket: WebSocket, message: dict):
+        """Queue a message for one connection"""
+        conn = self._connections.get(websocket)
+        if conn is not None:
+            self._enqueue(conn, dumps(message).decode())
+    
     async def send_personal_message(self, receiver_id: str, message: dict):
         """Send message to a specific user if online"""
-        if receiver_id in self.active_connections:
-            disconnected = []
-            
-            for connection in self.active_connections[receiver_id]:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except Exception as e:
-                    logger.warning(f"Failed to send to {receiver_id}: {e}")
-                    disconnected.append(connection)
-            
-            # Clean up disconnected connections
-            for conn in disconnected:
-                await self.disconnect(conn, receiver_id)
+        connections = self.active_connections.get(receiver_id)
+        if not connections:
+            return
+        frame = dumps(message).decode()
+        for websocket in list(connections):
+            conn = self._connections.get(websocket)
+            if conn is not None:
+                self._enqueue(conn, frame)
     
     async def broadcast(self, message: dict):
         """Send message to all connected users"""
-        disconnected = []
-        
-        for user_id, connections in list(self.active_connections.items()):
-            for connection in connections:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except Exception as e:
-                    logger.warning(f"Broadcast failed for {user_id}: {e}")
-                    disconnected.append((user_id, connection))
-        
-        # Clean up disconnected connections
-        for user_id, conn in disconnected:
-            await self.disconnect(conn, user_id)
+        frame = dumps(message).decode()
+        for conn in list(self._connections.values()):
+            self._enqueue(conn, frame)
     
     async def broadcast_online_users(self):
         """Broadcast list of currently online users to everyone"""
@@ -94,6 +194,32 @@ class ConnectionManager:
     def is_user_online(self, user_id: str) -> bool:
         """Check if a user is online"""
         return user_id in self.active_connections
+    
+    def stats(self) -> dict:
+        """Connection and queue counters for monitoring"""
+        return {
+            "users": len(self.active_connections),
+            "connections": len(self._connections),
+            "queued_frames": sum(c.queue.qsize() for c in self._connections.values()),
+            "frames_sent": self.frames_sent,
+            "slow_consumers_dropped": self.slow_consumers_dropped,
+        }
+    
+    async def shutdown(self):
+        """Stop every writer task"""
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+            self._watchdog = None
+        writers = []
+        for conn in self._connections.values():
+            conn.closed = True
+            if conn.writer is not None:
+                conn.writer.cancel()
+                writers.append(conn.writer)
+        await asyncio.gather(*writers, return_exceptions=True)
 
 # Global connection manager instance
-connection_manager = ConnectionManager()
\ No newline at end of file
+connection_manager = ConnectionManager(
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    send_timeout=settings.WS_SEND_TIMEOUT_SECONDS
+)
@@ -1,12 +1,26 @@
-import React from 'react';
+import React, { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Card, CardHeader, CardContent, CardFooter } from './ui/card';
 import { Button } from './ui/button';
 import { Badge } from './ui/badge';
 import { ShieldCheck, Star } from 'lucide-react';
 
+const FALLBACK_IMAGE = 'https://images.unsplash.com/photo-1505740420928-5e560c06d30e?w=400';
+
+// Grid tiles are at most ~400px wide, so the larger widths only serve HiDPI screens
+const TILE_WIDTHS = [320, 640];
+
+const tileSrcSet = (variants) =>
+  TILE_WIDTHS.filter((w) => variants?.[`w${w}`])
+    .map((w) => `${variants[`w${w}`]} ${w}w`)
+    .join(', ');
+
 const ListingCard = ({ listing }) => {
   const navigate = useNavigate();
+  const original = listing.images?.[0] || FALLBACK_IMAGE;
+  const srcSet = tileSrcSet(listing.image_variants?.[0]);
+  // Fall back to the original if a derivative is missing or fails to load
+  const [useOriginal, setUseOriginal] = useState(false);
 
   return (
     <Card
@@ -16,7 +30,10 @@ const ListingCard = ({ listing }) => {
     >
       <div className="relative aspect-[4/3] overflow-hidden bg-muted">
         <img
-          src={listing.images?.[0] || 'https://images.unsplash.com/photo-1505740420928-5e560c06d30e?w=400'}
+          src={!useOriginal && srcSet ? listing.image_variants[0].w320 : original}
+          srcSet={!useOriginal && srcSet ? srcSet : undefined}
+          sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
+          onError={() => setUseOriginal(true)}
           alt={listing.title}
           className="h-full w-full object-cover transition-transform duration-300 group-hover:scale-[1.02]"
           loading="lazy"
@@ -97,27 +97,25 @@ const Cart = ({ user }) => {
 
     setUpdating(true);
     try {
-      // Create orders for each item
-      const orderPromises = cartItems.map((item) =>
-        api.post(`/orders?listing_id=${item.id}&quantity=${item.quantity}`)
-      );
-
-      const orders = await Promise.all(orderPromises);
+      // One request creates every order and a single payment session
+      const response = await api.post("/checkout/cart", {
+        items: cartItems.map((item) => ({
+          listing_id: item.id,
+          quantity: item.quantity,
+        })),
+      });
 
       // Clear cart
       localStorage.removeItem(`cart_${user.id}`);
       setCartItems([]);
 
-      toast.success(`${orders.length} order(s) created successfully!`);
-
-      // Redirect to first order checkout
-      if (orders.length > 0) {
-        navigate(`/checkout/${orders[0].data.id}`);
-      }
+      toast.success(
+        `${response.data.order_ids.length} order(s) created, redirecting to payment...`
+      );
+      window.location.href = response.data.url;
     } catch (error) {
       console.error("Checkout error:", error);
       toast.error(error.response?.data?.detail || "Checkout failed");
-    } finally {
       setUpdating(false);
     }
   };
@@ -18,16 +18,11 @@ const Checkout = ({ user }) => {
 
   const fetchOrder = async () => {
     try {
-      const response = await api.get('/orders');
-      const foundOrder = response.data.find(o => o.id === orderId);
-      if (foundOrder) {
-        setOrder(foundOrder);
-      } else {
-        toast.error('Order not found');
-      }
+      const response = await api.get(`/orders/${orderId}`);
+      setOrder(response.data);
     } catch (error) {
       console.error('Error fetching order:', error);
-      toast.error('Failed to load order');
+      toast.error(error.response?.status === 404 ? 'Order not found' : 'Failed to load order');
     } finally {
       setLoading(false);
     }
@@ -22,6 +22,7 @@ const ListingDetail = ({ user }) => {
   const navigate = useNavigate();
   const [listing, setListing] = useState(null);
   const [reviews, setReviews] = useState([]);
+  const [reviewsCursor, setReviewsCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [quantity, setQuantity] = useState(1);
   const [showBookingModal, setShowBookingModal] = useState(false);
@@ -47,12 +48,17 @@ const ListingDetail = ({ user }) => {
     }
   };
 
-  const fetchReviews = async () => {
+  const fetchReviews = async (cursor = null) => {
     try {
-      const response = await fetch(`http://localhost:8000/api/reviews/${id}`);
+      const params = new URLSearchParams({ sort: "newest" });
+      if (cursor) params.set("cursor", cursor);
+      const response = await fetch(
+        `http://localhost:8000/api/reviews/${id}?${params}`
+      );
       if (response.ok) {
         const data = await response.json();
-        setReviews(data);
+        setReviews((prev) => (cursor ? [...prev, ...data] : data));
+        setReviewsCursor(response.headers.get("X-Next-Cursor"));
       }
     } catch (error) {
       console.error("Error fetching reviews:", error);
@@ -421,6 +427,26 @@ const ListingDetail = ({ user }) => {
             Customer Reviews
           </h2>
 
+          {listing.reviews_count > 0 && (
+            <div className="mb-6 max-w-md space-y-1">
+              {[5, 4, 3, 2, 1].map((star) => {
+                const count = listing.rating_histogram?.[star] || 0;
+                return (
+                  <div key={star} className="flex items-center gap-2 text-sm">
+                    <span className="w-8 text-gray-600 dark:text-gray-400">{star}★</span>
+                    <div className="flex-1 h-2 rounded bg-gray-200 dark:bg-gray-700">
+                      <div
+                        className="h-2 rounded bg-yellow-400"
+                        style={{ width: `${(count / listing.reviews_count) * 100}%` }}
+                      />
+                    </div>
+                    <span className="w-10 text-right text-gray-500 dark:text-gray-400">{count}</span>
+                  </div>
+                );
+              })}
+            </div>
+          )}
+
           {reviews.length === 0 ? (
             <p className="text-gray-600 dark:text-gray-400">
               No reviews yet. Be the first to review!
@@ -459,6 +485,14 @@ const ListingDetail = ({ user }) => {
                   </p>
                 </div>
               ))}
+              {reviewsCursor && (
+                <button
+                  onClick={() => fetchReviews(reviewsCursor)}
+                  className="text-sm font-medium text-blue-600 hover:underline dark:text-blue-400"
+                >
+                  Load more reviews
+                </button>
+              )}
             </div>
           )}
         </div>
@@ -256,6 +256,8 @@ const categories = [
 const SellerDashboard = ({ user }) => {
   const [listings, setListings] = useState([]);
   const [orders, setOrders] = useState([]);
+  const [ordersCursor, setOrdersCursor] = useState(null);
+  const [orderSummary, setOrderSummary] = useState(null);
   const [bookings, setBookings] = useState([]);
   const [loading, setLoading] = useState(true);
   const [showAddListing, setShowAddListing] = useState(false);
@@ -277,17 +279,21 @@ const SellerDashboard = ({ user }) => {
 
   const fetchData = async () => {
     try {
-      const [listingsRes, ordersRes, bookingsRes] = await Promise.all([
-        api.get("/listings"),
-        api.get("/orders"),
-        api.get("/bookings/my-bookings"),
-      ]);
+      const [listingsRes, ordersRes, summaryRes, bookingsRes] =
+        await Promise.all([
+          api.get("/listings"),
+          api.get("/orders"),
+          api.get("/orders/summary"),
+          api.get("/bookings/my-bookings"),
+        ]);
 
       const myListings = listingsRes.data.filter(
         (p) => p.seller_id === user.id
       );
       setListings(myListings);
       setOrders(ordersRes.data);
+      setOrdersCursor(ordersRes.headers["x-next-cursor"] || null);
+      setOrderSummary(summaryRes.data);
       setBookings(bookingsRes.data.bookings || []);
     } catch (error) {
       console.error("Error fetching data:", error);
@@ -297,6 +303,19 @@ const SellerDashboard = ({ user }) => {
     }
   };
 
+  const loadMoreOrders = async () => {
+    try {
+      const response = await api.get("/orders", {
+        params: { cursor: ordersCursor },
+      });
+      setOrders((prev) => [...prev, ...response.data]);
+      setOrdersCursor(response.headers["x-next-cursor"] || null);
+    } catch (error) {
+      console.error("Error loading orders:", error);
+      toast.error("Failed to load more orders");
+    }
+  };
+
   const handleAddListing = async (e) => {
     e.preventDefault();
 
@@ -360,10 +379,8 @@ const SellerDashboard = ({ user }) => {
     setShowAvailability(true);
   };
 
-  const totalRevenue = orders.reduce(
-    (sum, order) => sum + order.total_amount,
-    0
-  );
+  const totalRevenue = orderSummary?.total_amount || 0;
+  const totalOrders = orderSummary?.total_orders || 0;
   const totalViews = listings.reduce(
     (sum, listing) => sum + (listing.reviews_count || 0),
     0
@@ -569,7 +586,7 @@ const SellerDashboard = ({ user }) => {
                   <TrendingUp className="text-blue-500" size={24} />
                 </div>
                 <div>
-                  <p className="text-2xl font-bold">{orders.length}</p>
+                  <p className="text-2xl font-bold">{totalOrders}</p>
                   <p className="text-sm text-muted-foreground">Orders</p>
                 </div>
               </div>
@@ -880,6 +897,15 @@ const SellerDashboard = ({ user }) => {
                     </CardContent>
                   </Card>
                 ))}
+                {ordersCursor && (
+                  <Button
+                    variant="outline"
+                    className="w-full"
+                    onClick={loadMoreOrders}
+                  >
+                    Load more orders
+                  </Button>
+                )}
               </div>
             ) : (
               <Card>